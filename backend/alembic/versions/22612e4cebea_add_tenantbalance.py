@@ -0,0 +1,53 @@
+"""Add tenantbalance read model
+
+Revision ID: 22612e4cebea
+Revises: 25d0c85946e0
+Create Date: 2026-10-18 11:03:27.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22612e4cebea'
+down_revision: Union[str, Sequence[str], None] = '25d0c85946e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenantbalance',
+    sa.Column('total_due', sa.Float(), nullable=False),
+    sa.Column('overdue_amount', sa.Float(), nullable=False),
+    sa.Column('next_due_date', sa.Date(), nullable=True),
+    sa.Column('last_payment_date', sa.DateTime(), nullable=True),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('computed_on', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+    # Backfill from the existing charges and payments
+    op.execute("""
+        INSERT INTO tenantbalance (tenant_id, total_due, overdue_amount, next_due_date, last_payment_date, computed_on, updated_at)
+        SELECT t.id,
+               COALESCE(SUM(mc.balance_due), 0),
+               COALESCE(SUM(mc.balance_due) FILTER (WHERE mc.due_date < CURRENT_DATE), 0),
+               MIN(mc.due_date) FILTER (WHERE mc.due_date >= CURRENT_DATE),
+               (SELECT MAX(p.payment_date) FROM payment p WHERE p.tenant_id = t.id),
+               CURRENT_DATE,
+               now()
+        FROM tenant t
+        LEFT JOIN contract c ON c.tenant_id = t.id
+        LEFT JOIN monthlycharge mc ON mc.contract_id = c.id AND mc.balance_due > 0
+        GROUP BY t.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tenantbalance')
@@ -0,0 +1,62 @@
+"""Add indexes for hot query paths
+
+Revision ID: 25d0c85946e0
+Revises: 36231cc95c19
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '25d0c85946e0'
+down_revision: Union[str, Sequence[str], None] = '36231cc95c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    # Tenant -> contracts, first step of every allocation / balance lookup
+    ('ix_contract_tenant_id', 'contract', ['tenant_id'], None),
+    # Contract -> charges (expand=monthly_charges, statements)
+    ('ix_monthlycharge_contract_id_due_date', 'monthlycharge', ['contract_id', 'due_date'], None),
+    # FIFO allocation: pending charges of a contract, oldest due_date first.
+    # Paid charges are the bulk of the table and never qualify.
+    ('ix_monthlycharge_pending', 'monthlycharge', ['contract_id', 'due_date', 'id'], 'balance_due > 0'),
+    # Due / overdue scans across all contracts
+    ('ix_monthlycharge_pending_due_date', 'monthlycharge', ['due_date'], 'balance_due > 0'),
+    ('ix_payment_tenant_id', 'payment', ['tenant_id'], None),
+    # Keyset pagination with sort=payment_date / sort=full_name
+    ('ix_payment_payment_date_id', 'payment', ['payment_date', 'id'], None),
+    ('ix_tenant_full_name_id', 'tenant', ['full_name', 'id'], None),
+    ('ix_paymentallocation_payment_id', 'paymentallocation', ['payment_id'], None),
+    ('ix_paymentallocation_charge_id', 'paymentallocation', ['charge_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY does not block writes but cannot run inside a
+    # transaction block, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
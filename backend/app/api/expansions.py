@@ -0,0 +1,27 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+
+# name -> (loader options when expanded, loader options otherwise)
+Expansions = Dict[str, Tuple[Sequence, Sequence]]
+
+
+def expansion_options(expand: Optional[str], expansions: Expansions) -> List:
+    """
+    Turns a comma separated ?expand= value into loader options.
+
+    Expanded relationships are eager loaded with a fixed number of extra
+    queries (selectinload); the rest are left empty without touching the DB,
+    so lean listings cost a single query however many rows they return.
+    """
+    requested = {name.strip() for name in expand.split(",") if name.strip()} if expand else set()
+    unknown = requested - set(expansions)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown expand value(s): {', '.join(sorted(unknown))}. Expected: {', '.join(expansions)}",
+        )
+
+    options = []
+    for name, (expanded, lean) in expansions.items():
+        options.extend(expanded if name in requested else lean)
+    return options
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import Date, DateTime, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort: str, value, last_id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, column):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort:
+            raise ValueError("cursor was issued for another sort key")
+        value = data["v"]
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        return value, int(data["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+async def paginate(
+    session: AsyncSession,
+    stmt,
+    model,
+    response: Response,
+    sort: str = "id",
+    sort_keys: Optional[Dict[str, object]] = None,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List:
+    """
+    Runs a listing query with a stable (sort key, id) ordering.
+
+    With a cursor the page starts right after the last row of the previous one
+    (keyset pagination, constant cost at any depth); without one, skip/limit
+    offsets are applied as before. Whenever the page is full, the opaque cursor
+    for the next page is returned in the X-Next-Cursor header.
+    """
+    sort_keys = sort_keys or {"id": model.id}
+    if sort not in sort_keys:
+        raise HTTPException(status_code=400, detail=f"Invalid sort key, expected one of: {', '.join(sort_keys)}")
+    sort_column = sort_keys[sort]
+
+    if sort_column is model.id:
+        stmt = stmt.order_by(model.id)
+        if cursor:
+            _, last_id = decode_cursor(cursor, sort, model.id)
+            stmt = stmt.where(model.id > last_id)
+    else:
+        stmt = stmt.order_by(sort_column, model.id)
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort, sort_column)
+            stmt = stmt.where(tuple_(sort_column, model.id) > tuple_(value, last_id))
+
+    if not cursor:
+        stmt = stmt.offset(skip)
+    result = await session.execute(stmt.limit(limit))
+    rows = result.scalars().all()
+
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, getattr(last, sort), last.id)
+    return rows
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import contracts, tenants, payments, whatsapp, properties
+from app.api.v1.endpoints import contracts, tenants, payments, whatsapp, properties, portal, monitoring
 
 api_router = APIRouter()
 api_router.include_router(contracts.router, prefix="/contracts", tags=["contracts"])
@@ -7,3 +7,5 @@ api_router.include_router(tenants.router, prefix="/tenants", tags=["tenants"])
 api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(whatsapp.router, prefix="/whatsapp", tags=["whatsapp"])
 api_router.include_router(properties.router, prefix="/properties", tags=["properties"])
+api_router.include_router(portal.router, prefix="/portal", tags=["portal"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["monitoring"])
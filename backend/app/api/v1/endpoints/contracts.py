@@ -1,46 +1,98 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.orm import noload, selectinload
 
-from app.db.session import get_session
+from app.api.expansions import expansion_options
+from app.api.pagination import paginate
+from app.db.session import get_read_session, get_session
 from app.models import Contract
-from app.schemas.all import ContractCreate, ContractRead
+from app.core.config import settings
+from app.schemas.all import ContractCreate, ContractRead, ImportResult
 from app.services.contracts import ContractService
+from app.services.contract_import import import_contracts
+from app.services.row_parsers import ROW_PARSERS, iter_lines
 
 router = APIRouter()
 
+CONTRACT_EXPANSIONS = {
+    "monthly_charges": (
+        [selectinload(Contract.monthly_charges)],
+        [noload(Contract.monthly_charges)],
+    ),
+}
+
+async def _get_contract(session: AsyncSession, contract_id: int, expand: Optional[str]) -> Optional[Contract]:
+    stmt = (
+        select(Contract)
+        .where(Contract.id == contract_id)
+        .options(*expansion_options(expand, CONTRACT_EXPANSIONS))
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().first()
+
 @router.post("/", response_model=ContractRead)
 async def create_contract(
     contract_in: ContractCreate,
+    expand: Optional[str] = None,
     session: AsyncSession = Depends(get_session)
 ):
     contract = Contract.from_orm(contract_in)
     # Use Service to create charges automatically
     created_contract = await ContractService.create_contract(session, contract)
     await session.commit()
-    await session.refresh(created_contract)
-    return created_contract
+    return await _get_contract(session, created_contract.id, expand)
+
+@router.post("/import", response_model=ImportResult)
+async def import_contracts_bulk(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=10000),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Bulk loads contracts from a CSV (with header) or NDJSON request body.
+    The body is streamed and committed in batches; rows that fail validation
+    or whose batch cannot be written are listed in the error report.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+
+    rows = ROW_PARSERS[format](iter_lines(request.stream()))
+    return await import_contracts(
+        session, rows, batch_size or settings.CONTRACT_IMPORT_BATCH_SIZE
+    )
 
 @router.get("/", response_model=List[ContractRead])
 async def read_contracts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    session: AsyncSession = Depends(get_session)
+    cursor: Optional[str] = None,
+    sort: Literal["id", "start_date", "end_date"] = "id",
+    expand: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session)
 ):
-    stmt = select(Contract).offset(skip).limit(limit)
-    result = await session.execute(stmt)
-    contracts = result.scalars().all()
-    return contracts
+    """
+    Lists contracts. Pass expand=monthly_charges to include the charges.
+    """
+    sort_keys = {"id": Contract.id, "start_date": Contract.start_date, "end_date": Contract.end_date}
+    stmt = select(Contract).options(*expansion_options(expand, CONTRACT_EXPANSIONS))
+    return await paginate(
+        session, stmt, Contract, response,
+        sort=sort, sort_keys=sort_keys, cursor=cursor, skip=skip, limit=limit,
+    )
 
 @router.get("/{contract_id}", response_model=ContractRead)
 async def read_contract(
     contract_id: int,
+    expand: Optional[str] = None,
     session: AsyncSession = Depends(get_session)
 ):
-    stmt = select(Contract).where(Contract.id == contract_id)
-    result = await session.execute(stmt)
-    contract = result.scalars().first()
+    contract = await _get_contract(session, contract_id, expand)
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     return contract
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from app.db.session import pool_stats, replica_stats
+
+router = APIRouter()
+
+@router.get("/db-pool")
+async def db_pool():
+    """
+    Live connection pool usage of this worker process, to size DB_POOL_SIZE
+    and DB_MAX_OVERFLOW under load.
+    """
+    return pool_stats()
+
+@router.get("/db-replica")
+async def db_replica():
+    """
+    Whether read-only endpoints are currently served by the replica, its last
+    measured lag and its pool usage.
+    """
+    return replica_stats()
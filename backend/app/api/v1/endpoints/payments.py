@@ -1,34 +1,99 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.orm import noload, selectinload
 
-from app.db.session import get_session
-from app.models import Payment
-from app.schemas.all import PaymentCreate, PaymentRead
+from app.api.expansions import expansion_options
+from app.api.pagination import paginate
+from app.db.session import get_read_session, get_session
+from app.models import Payment, PaymentAllocation
+from app.core.config import settings
+from app.schemas.all import PaymentCreate, PaymentRead, PaymentBatchResult
 from app.services.payments import PaymentService
+from app.services.row_parsers import ROW_PARSERS, iter_json_array_rows, iter_lines
 
 router = APIRouter()
 
+PAYMENT_EXPANSIONS = {
+    # Allocations carry charge_month/charge_year, so their charge comes along
+    "allocations": (
+        [selectinload(Payment.allocations).selectinload(PaymentAllocation.charge)],
+        [noload(Payment.allocations)],
+    ),
+}
+
 @router.post("/", response_model=PaymentRead)
 async def create_payment(
     payment_in: PaymentCreate,
+    expand: Optional[str] = None,
     session: AsyncSession = Depends(get_session)
 ):
     payment = Payment.from_orm(payment_in)
     # Use Service to allocate payment automatically
     created_payment = await PaymentService.process_payment(session, payment)
     await session.commit()
-    await session.refresh(created_payment)
-    return created_payment
+    stmt = (
+        select(Payment)
+        .where(Payment.id == created_payment.id)
+        .options(*expansion_options(expand, PAYMENT_EXPANSIONS))
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().first()
+
+@router.post("/batch", response_model=PaymentBatchResult)
+async def create_payment_batch(
+    request: Request,
+    format: Optional[Literal["json", "csv", "ndjson"]] = None,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=10000),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Posts a bank reconciliation file of PaymentCreate records in one request.
+    Accepts a JSON array, NDJSON or CSV (with header) body; the response has
+    one result per item plus throughput stats.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type:
+            format = "ndjson"
+        else:
+            format = "json"
+
+    if format == "json":
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of payments")
+        rows = iter_json_array_rows(items)
+    else:
+        rows = ROW_PARSERS[format](iter_lines(request.stream()))
+
+    return await PaymentService.post_payment_batch(
+        session, rows, batch_size or settings.PAYMENT_BATCH_SIZE
+    )
 
 @router.get("/", response_model=List[PaymentRead])
 async def read_payments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    session: AsyncSession = Depends(get_session)
+    cursor: Optional[str] = None,
+    sort: Literal["id", "payment_date"] = "id",
+    expand: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session)
 ):
-    stmt = select(Payment).offset(skip).limit(limit)
-    result = await session.execute(stmt)
-    payments = result.scalars().all()
-    return payments
+    """
+    Lists payments. Pass expand=allocations to include how each one was allocated.
+    """
+    sort_keys = {"id": Payment.id, "payment_date": Payment.payment_date}
+    stmt = select(Payment).options(*expansion_options(expand, PAYMENT_EXPANSIONS))
+    return await paginate(
+        session, stmt, Payment, response,
+        sort=sort, sort_keys=sort_keys, cursor=cursor, skip=skip, limit=limit,
+    )
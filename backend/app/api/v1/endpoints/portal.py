@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import get_session
+from app.schemas.all import PortalStatement
+from app.services.portal import build_statement, portal_cache
+
+router = APIRouter()
+
+def _statement_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/{token}", response_model=PortalStatement)
+async def read_portal_statement(
+    token: str,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Tenant account statement: contracts, monthly charges and how each charge
+    was paid. Served from the per-token cache when possible; send the ETag
+    back in If-None-Match to get a 304 without a body.
+    """
+    cached = portal_cache.get(token)
+    if cached:
+        return _statement_response(request, cached.body, cached.etag)
+
+    generation = portal_cache.generation()
+    built = await build_statement(session, token)
+    if not built:
+        raise HTTPException(status_code=404, detail="Statement not found")
+    tenant_id, statement = built
+    entry = portal_cache.put(token, tenant_id, statement.model_dump_json().encode(), generation)
+    return _statement_response(request, entry.body, entry.etag)
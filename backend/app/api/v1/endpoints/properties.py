@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from app.db.session import get_session
+from app.db.session import get_read_session, get_session
 from app.models.base_entities import Property
 from app.schemas.all import PropertyCreate, PropertyRead
 from typing import List
@@ -9,7 +9,7 @@ from typing import List
 router = APIRouter()
 
 @router.get("/", response_model=List[PropertyRead])
-async def list_properties(session: AsyncSession = Depends(get_session)):
+async def list_properties(session: AsyncSession = Depends(get_read_session)):
     result = await session.execute(select(Property))
     return result.scalars().all()
 
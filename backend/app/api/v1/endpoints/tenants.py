@@ -1,12 +1,14 @@
 import secrets
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
-from app.db.session import get_session
+from app.api.pagination import paginate
+from app.db.session import get_read_session, get_session
 from app.models import Tenant
-from app.schemas.all import TenantCreate, TenantRead
+from app.schemas.all import TenantCreate, TenantRead, TenantBalanceRead
+from app.services.balances import BalanceService
 
 router = APIRouter()
 
@@ -26,11 +28,25 @@ async def create_tenant(
 
 @router.get("/", response_model=List[TenantRead])
 async def read_tenants(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: Literal["id", "full_name"] = "id",
+    session: AsyncSession = Depends(get_read_session)
+):
+    sort_keys = {"id": Tenant.id, "full_name": Tenant.full_name}
+    return await paginate(
+        session, select(Tenant), Tenant, response,
+        sort=sort, sort_keys=sort_keys, cursor=cursor, skip=skip, limit=limit,
+    )
+
+@router.get("/{tenant_id}/balance", response_model=TenantBalanceRead)
+async def read_tenant_balance(
+    tenant_id: int,
     session: AsyncSession = Depends(get_session)
 ):
-    stmt = select(Tenant).offset(skip).limit(limit)
-    result = await session.execute(stmt)
-    tenants = result.scalars().all()
-    return tenants
+    balance = await BalanceService.get_balance(session, tenant_id)
+    if not balance:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return balance
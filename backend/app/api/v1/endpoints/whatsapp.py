@@ -1,72 +1,67 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
-from app.services.whatsapp import whatsapp_service
-from app.db.session import get_session
-from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from app.models.base_entities import Property
+from fastapi import APIRouter, Request, HTTPException
+from app.services.message_queue import message_queue
+from app.services.whatsapp_bot import extract_messages
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/webhook")
-async def whatsapp_webhook(request: Request, session: AsyncSession = Depends(get_session)):
+async def whatsapp_webhook(request: Request):
     """
     Receives webhook events from Evolution API.
+    Messages are queued and answered by background workers, so the event is
+    acknowledged without waiting for the AI and the outgoing send.
     """
     try:
         payload = await request.json()
         event_type = payload.get('event')
-        data = payload.get('data', {})
-        
         logger.info(f"Received webhook event: {event_type}")
-        
+
         # Evolution API sends messages in 'messages.upsert' event
-        if event_type == 'messages.upsert':
-            messages = data.get('messages', [])
-            if not messages:
-                messages = [data] if data.get('key') else []
+        messages = extract_messages(payload)
+    except Exception as e:
+        logger.error(f"Error processing webhook: {e}")
+        return {"status": "error", "reason": str(e)}
 
-            for message in messages:
-                if message.get('key', {}).get('fromMe'):
-                    continue
+    if messages and not message_queue.submit(messages):
+        # Backpressure: Evolution API retries failed deliveries
+        raise HTTPException(status_code=503, detail="Message queue is full", headers={"Retry-After": "5"})
 
-                remote_jid = message.get('key', {}).get('remoteJid')
-                if not remote_jid or '@s.whatsapp.net' not in remote_jid:
-                    continue
+    return {"status": "success", "event": event_type, "queued": len(messages)}
 
-                msg_body = message.get('message', {})
-                content = (
-                    msg_body.get('conversation') or 
-                    msg_body.get('extendedTextMessage', {}).get('text') or
-                    msg_body.get('imageMessage', {}).get('caption')
-                )
+@router.get("/queue")
+async def queue_stats():
+    """
+    Depth, counters and latency percentiles of the message worker pool.
+    """
+    return message_queue.stats()
 
-                if content:
-                    sender_name = message.get('pushName', 'Usuario')
-                    phone_number = remote_jid.split('@')[0]
-                    
-                    # 1. Fetch available properties to give context to AI
-                    result = await session.execute(select(Property).where(Property.status == "available"))
-                    properties = result.scalars().all()
-                    
-                    prop_context = "Propiedades disponibles:\n"
-                    for p in properties:
-                        prop_context += f"- {p.address} ({p.city}): {p.type}, ${p.price}\n"
-                    
-                    # 2. Process with OpenAI
-                    from app.services.openai_service import openai_service
-                    ai_response = await openai_service.generate_response(
-                        content, 
-                        context=f"Usuario: {sender_name}\n\n{prop_context}"
-                    )
-                    
-                    # 3. Send response back
-                    if ai_response:
-                        await whatsapp_service.send_text_message(phone_number, ai_response)
+@router.get("/ai-cache")
+async def ai_cache_stats():
+    """
+    Size and hit/miss counters of the AI response cache.
+    """
+    from app.services.openai_service import openai_service
+    return openai_service.cache.stats()
 
-        return {"status": "success", "event": event_type}
+@router.get("/conversations")
+async def conversation_stats():
+    """
+    Chats held in conversation memory and their size.
+    """
+    from app.services.whatsapp_bot import conversation_store
+    return conversation_store.stats()
 
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
-        return {"status": "error", "reason": str(e)}
+@router.get("/latency")
+async def latency_stats():
+    """
+    Latency histograms of the bot: upstream (OpenAI, Evolution API) and our
+    own phases, plus the state of the OpenAI circuit breaker.
+    """
+    from app.core.metrics import snapshot_all
+    from app.services.openai_service import openai_service
+    return {
+        "openai_circuit": openai_service.breaker.state,
+        "histograms": snapshot_all(("openai_", "whatsapp_", "outbound_")),
+    }
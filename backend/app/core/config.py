@@ -30,6 +30,85 @@ class Settings(BaseSettings):
             return v
         return str(f"postgresql+asyncpg://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}")
 
+    # Optional read replica for read-only endpoints. Reads fall back to the
+    # primary while the replica lags more than REPLICA_MAX_LAG_SECONDS (or
+    # can't be reached); lag is rechecked every REPLICA_LAG_CHECK_SECONDS.
+    DATABASE_REPLICA_URI: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # A lag check that takes longer (unreachable host) marks the replica down
+    REPLICA_PROBE_TIMEOUT_SECONDS: float = 2.0
+
+    # Connection pool (per worker process, and again for the replica)
+    DB_ECHO: bool = False # Log every SQL statement
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30000 # 0 disables
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Behind PgBouncer in transaction mode: no prepared statement reuse, no
+    # startup parameters (the statement timeout becomes client side)
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Requests slower than this are logged with their slowest SQL statements
+    SLOW_REQUEST_SECONDS: float = 1.0
+    SLOW_REQUEST_LOG_QUERIES: int = 5
+    # Statements slower than this are logged with parameters and route; a
+    # sample gets an EXPLAIN (ANALYZE, BUFFERS) captured in the background
+    SLOW_QUERY_SECONDS: float = 0.2
+    SLOW_QUERY_LOG_PARAMETERS: bool = True
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = 300
+    SLOW_QUERY_MAX_CONCURRENT_EXPLAINS: int = 1
+
+    # Bulk imports
+    CONTRACT_IMPORT_BATCH_SIZE: int = 500
+
+    # Payments
+    # Serializes payment allocation per tenant: "advisory" (pg_advisory_xact_lock
+    # keyed by tenant_id), "row" (row locks on the tenant and its pending charges) or "none"
+    PAYMENT_LOCK_MODE: str = "advisory"
+    PAYMENT_BATCH_SIZE: int = 1000
+
+    # Tenant portal
+    PORTAL_CACHE_MAX_ENTRIES: int = 10000
+    # Upper bound on staleness when another worker process took the write
+    PORTAL_CACHE_TTL_SECONDS: int = 300
+
+    # WhatsApp bot
+    # Properties given to the AI per message (best matches for the question) and
+    # max age of the in-memory index (other workers' writes)
+    PROPERTY_CONTEXT_TOP_K: int = 10
+    PROPERTY_CONTEXT_TTL_SECONDS: int = 60
+    # Background workers answering webhook messages, and how many messages may
+    # wait for them before the webhook answers 503
+    WHATSAPP_WORKERS: int = 4
+    WHATSAPP_QUEUE_MAX_SIZE: int = 1000
+    # Evolution API redelivers messages.upsert; ids seen within the TTL are dropped
+    WHATSAPP_DEDUPE_MAX_ENTRIES: int = 50000
+    WHATSAPP_DEDUPE_TTL_SECONDS: int = 3600
+    # Sender -> tenant (with balance) lookups; numbers that are not tenants are
+    # rechecked sooner so newly registered tenants get recognized
+    TENANT_LOOKUP_CACHE_MAX_ENTRIES: int = 20000
+    TENANT_LOOKUP_TTL_SECONDS: int = 600
+    TENANT_LOOKUP_NEGATIVE_TTL_SECONDS: int = 60
+    # Per-chat memory: turns kept, how many of their tokens go into each prompt,
+    # and when idle chats are forgotten
+    CONVERSATION_MAX_TURNS: int = 20
+    CONVERSATION_TOKEN_BUDGET: int = 800
+    CONVERSATION_MAX_CHATS: int = 10000
+    CONVERSATION_IDLE_TTL_SECONDS: int = 1800
+
+    # Charge notifications (send_charge_notifications.py)
+    REMINDER_DAYS_BEFORE_DUE: int = 3
+    # Tenants per claim/send/record round trip
+    NOTIFICATION_BATCH_SIZE: int = 500
+    NOTIFICATION_SEND_CONCURRENCY: int = 20
+    # Claims of a run that died before recording the send can be retaken after this
+    NOTIFICATION_CLAIM_TIMEOUT_MINUTES: int = 30
+
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -39,9 +118,30 @@ class Settings(BaseSettings):
     EVOLUTION_API_URL: str
     EVOLUTION_API_TOKEN: str
     INSTANCE_NAME: str = "Inmonea"
+    EVOLUTION_TIMEOUT_SECONDS: float = 10.0
+    EVOLUTION_MAX_CONNECTIONS: int = 20
+    EVOLUTION_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    # Sends per second allowed for the instance (0 disables pacing) and burst size
+    EVOLUTION_SEND_RATE_PER_SECOND: float = 20
+    EVOLUTION_SEND_BURST: int = 20
+    # Retries on 429/503 and connect errors, with jittered exponential backoff;
+    # also caps the wait a Retry-After header can ask for
+    EVOLUTION_MAX_RETRIES: int = 3
+    EVOLUTION_RETRY_MAX_DELAY_SECONDS: float = 10.0
 
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
+    # Answers reused for repeated questions against the same context (0 disables)
+    OPENAI_CACHE_MAX_ENTRIES: int = 2000
+    OPENAI_CACHE_TTL_SECONDS: int = 600
+    # Completions in flight at once; the rest wait up to OPENAI_QUEUE_TIMEOUT_SECONDS for a slot
+    OPENAI_MAX_CONCURRENCY: int = 8
+    OPENAI_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    # Deadline of the API call itself; only these timeouts count against the breaker
+    OPENAI_TIMEOUT_SECONDS: float = 20.0
+    # Consecutive failures that open the circuit, and how long it stays open
+    OPENAI_BREAKER_FAILURES: int = 5
+    OPENAI_BREAKER_RESET_SECONDS: float = 30.0
 
     model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
 
@@ -0,0 +1,127 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.metrics import COUNT_BUCKETS, histogram, histogram_family
+from app.core.slow_queries import slow_query_log
+
+logger = logging.getLogger("app.slow_requests")
+
+# Statements kept per request for the slow request log (the slowest survive)
+MAX_TRACKED_QUERIES = 200
+
+request_seconds = histogram_family(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+request_db_statements = histogram_family(
+    "http_request_db_statements", "SQL statements executed per request", ["route"], COUNT_BUCKETS
+)
+request_db_seconds = histogram_family("http_request_db_seconds", "Time spent in SQL per request", ["route"])
+db_statement_seconds = histogram("db_statement_seconds", "Duration of each SQL statement")
+outbound_seconds = histogram_family(
+    "outbound_request_seconds", "Calls to external services (one observation per attempt)", ["service"]
+)
+
+
+@dataclass
+class RequestStats:
+    scope: Optional[dict] = None
+    statements: int = 0
+    db_seconds: float = 0.0
+    outbound_seconds: float = 0.0
+    queries: List[Tuple[float, str]] = field(default_factory=list) # (seconds, sql)
+
+    def add_query(self, seconds: float, statement: str):
+        self.statements += 1
+        self.db_seconds += seconds
+        self.queries.append((seconds, statement))
+        if len(self.queries) > MAX_TRACKED_QUERIES:
+            self.queries.sort(reverse=True)
+            del self.queries[MAX_TRACKED_QUERIES // 2:]
+
+    @property
+    def route(self) -> str:
+        # Resolved lazily: routing fills the scope in after the middleware ran
+        if self.scope is None:
+            return "-"
+        return f"{self.scope['method']} {route_template(self.scope)}"
+
+
+# Stats of the HTTP request being handled, if any (set by the middleware)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Times every statement of the engine, globally and for the current request,
+    and hands slow ones to the slow query log.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_statement_seconds.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_query(elapsed, statement)
+        if elapsed >= slow_query_log.threshold_seconds:
+            route = stats.route if stats is not None else "background"
+            slow_query_log.observe(engine, statement, parameters, elapsed, executemany, route)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(exception_context):
+        # A statement that raised never reaches after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and exception_context.execution_context is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def record_outbound(service: str, seconds: float):
+    outbound_seconds.labels(service).observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.outbound_seconds += seconds
+
+
+def route_template(scope: dict) -> str:
+    """
+    The matched route's own template (/api/v1/portal/{token}), so the label
+    set is bounded by the routes the app declares; a catch-all stays
+    /{full_path:path} whatever the URL. Routes of included routers may only
+    know their path inside the router, so the router prefix is the part of
+    the path before the shortest tail the route matches. Requests that
+    matched no route share one label.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + template
+    return template
+
+
+def record_request(method: str, route: str, status: int, seconds: float, stats: RequestStats):
+    request_seconds.labels(method, route, status).observe(seconds)
+    request_db_statements.labels(route).observe(stats.statements)
+    request_db_seconds.labels(route).observe(stats.db_seconds)
+
+    if seconds >= settings.SLOW_REQUEST_SECONDS:
+        slowest = sorted(stats.queries, reverse=True)[:settings.SLOW_REQUEST_LOG_QUERIES]
+        queries = "".join(f"\n  {q_seconds * 1000:.1f} ms: {' '.join(sql.split())[:500]}" for q_seconds, sql in slowest)
+        logger.warning(
+            f"Slow request {method} {route} -> {status} in {seconds * 1000:.0f} ms "
+            f"({stats.statements} statements, {stats.db_seconds * 1000:.0f} ms in DB, "
+            f"{stats.outbound_seconds * 1000:.0f} ms in outbound calls){queries}"
+        )
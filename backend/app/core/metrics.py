@@ -0,0 +1,184 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Upper bounds (seconds) for latency histograms, Prometheus style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Statements per request
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram (count, sum and one counter per
+    upper bound), cheap enough to observe on every request.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1) # Last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative_counts(self) -> List[int]:
+        total, cumulative = 0, []
+        for count in self._counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the q-th observation.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, cumulative in zip(self.buckets, self.cumulative_counts()):
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 4) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def samples(self, labels: str = "") -> List[str]:
+        prefix = f"{labels}," if labels else ""
+        bounds = [format_value(b) for b in self.buckets] + ["+Inf"]
+        lines = [
+            f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in zip(bounds, self.cumulative_counts())
+        ]
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{self.name}_sum{suffix} {format_value(self.sum)}")
+        lines.append(f"{self.name}_count{suffix} {self.count}")
+        return lines
+
+
+class HistogramFamily:
+    """
+    One Histogram per combination of label values, e.g. per route.
+    """
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, Histogram(self.name, self.description, self.buckets))
+        return child
+
+    def label_string(self, values: Tuple[str, ...]) -> str:
+        return ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(self.label_names, values))
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time (queue depth, pool usage...).
+    kind "counter" is for callbacks returning a running total.
+    """
+
+    def __init__(self, name: str, description: str, read: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.description = description
+        self.read = read
+        self.kind = kind
+
+
+Metric = Union[Histogram, HistogramFamily, Gauge]
+
+# name -> metric, for /metrics and the stats endpoints
+REGISTRY: Dict[str, Metric] = {}
+
+
+def histogram(name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    if name not in REGISTRY:
+        REGISTRY[name] = Histogram(name, description, buckets)
+    return REGISTRY[name]
+
+
+def histogram_family(name: str, description: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS) -> HistogramFamily:
+    if name not in REGISTRY:
+        REGISTRY[name] = HistogramFamily(name, description, label_names, buckets)
+    return REGISTRY[name]
+
+
+def gauge(name: str, description: str, read: Callable[[], float], kind: str = "gauge") -> Gauge:
+    # Re-registering replaces the callback (e.g. a recreated object)
+    REGISTRY[name] = Gauge(name, description, read, kind)
+    return REGISTRY[name]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        if isinstance(metric, Gauge):
+            try:
+                value = metric.read()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines += [f"# HELP {name} {metric.description}", f"# TYPE {name} {metric.kind}", f"{name} {format_value(value)}"]
+            continue
+        lines += [f"# HELP {name} {metric.description}", f"# TYPE {name} histogram"]
+        if isinstance(metric, HistogramFamily):
+            for values, child in sorted(metric.children.items()):
+                lines += child.samples(metric.label_string(values))
+        else:
+            lines += metric.samples()
+    return "\n".join(lines) + "\n"
+
+
+def snapshot_all(prefixes: Sequence[str] = ("",)) -> dict:
+    """
+    Percentile snapshots of the histograms whose name starts with a prefix,
+    labelled children as name{label="value"}.
+    """
+    result = {}
+    for name, metric in sorted(REGISTRY.items()):
+        if not name.startswith(tuple(prefixes)):
+            continue
+        if isinstance(metric, Histogram):
+            result[name] = metric.snapshot()
+        elif isinstance(metric, HistogramFamily):
+            for values, child in sorted(metric.children.items()):
+                result[f"{name}{{{metric.label_string(values)}}}"] = child.snapshot()
+    return result
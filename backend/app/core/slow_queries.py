@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import hashlib
+import logging
+import random
+import re
+import time
+from typing import Dict, Set
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.metrics import gauge
+
+logger = logging.getLogger("app.slow_queries")
+
+# Re-running these under ANALYZE would block on, or take, the locks the
+# original transaction holds; they get a plain EXPLAIN instead
+NOT_ANALYZABLE = re.compile(r"\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE)\b|\bpg_advisory|\bnextval\(|\bsetval\(", re.IGNORECASE)
+READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+DATA_MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+MAX_LOGGED_CHARS = 2000
+
+
+def compact_sql(statement: str, limit: int = MAX_LOGGED_CHARS) -> str:
+    return " ".join(statement.split())[:limit]
+
+
+def explain_prefix(statement: str) -> str:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) for plain reads; writes and locking reads only
+    get their estimated plan, since the explain runs them a second time.
+    """
+    if READ_ONLY.match(statement) and not DATA_MODIFYING.search(statement) and not NOT_ANALYZABLE.search(statement):
+        return "EXPLAIN (ANALYZE, BUFFERS) "
+    return "EXPLAIN "
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than threshold_seconds with their parameters and
+    the route that issued them. A sample of them is explained in the
+    background on a separate connection: at most once per statement per
+    explain_interval and never more than max_explains at a time, so a burst
+    of slow queries cannot double the load that caused it. The explain runs
+    in a transaction that is always rolled back.
+    """
+
+    def __init__(self, threshold_seconds: float, sample_rate: float, explain_interval: float, max_explains: int):
+        self.threshold_seconds = threshold_seconds
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+        self.max_explains = max_explains
+        self.slow_count = 0
+        self.explained = 0
+        self._explained_at: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def observe(self, engine: AsyncEngine, statement: str, parameters, seconds: float, executemany: bool, route: str):
+        if seconds < self.threshold_seconds or statement.lstrip().upper().startswith("EXPLAIN"):
+            return
+        self.slow_count += 1
+        fingerprint = hashlib.sha1(statement.encode()).hexdigest()[:10]
+        params = f" params={compact_sql(repr(parameters), 500)}" if settings.SLOW_QUERY_LOG_PARAMETERS else ""
+        logger.warning(
+            f"Slow query [{fingerprint}] {seconds * 1000:.0f} ms from {route}: {compact_sql(statement)}{params}"
+        )
+        if not executemany and self._should_explain(fingerprint):
+            self._schedule(engine, fingerprint, statement, parameters)
+
+    def _should_explain(self, fingerprint: str) -> bool:
+        if self.sample_rate <= 0 or len(self._tasks) >= self.max_explains:
+            return False
+        now = time.monotonic()
+        if now - self._explained_at.get(fingerprint, float("-inf")) < self.explain_interval:
+            return False
+        if random.random() >= self.sample_rate:
+            return False
+        self._explained_at[fingerprint] = now
+        if len(self._explained_at) > 1000:
+            cutoff = now - self.explain_interval
+            self._explained_at = {k: t for k, t in self._explained_at.items() if t >= cutoff}
+        return True
+
+    def _schedule(self, engine: AsyncEngine, fingerprint: str, statement: str, parameters):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError: # Sync caller (scripts), nothing to run the explain on
+            return
+        # Fresh context: the explain's statements must not count toward the request that triggered it
+        task = loop.create_task(self._explain(engine, fingerprint, statement, parameters), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, fingerprint: str, statement: str, parameters):
+        prefix = explain_prefix(statement)
+        try:
+            async with engine.connect() as conn:
+                try:
+                    result = await conn.exec_driver_sql(prefix + statement, parameters)
+                    plan = "\n".join(row[0] for row in result)
+                finally:
+                    await conn.rollback()
+            self.explained += 1
+            logger.warning(f"Plan for slow query [{fingerprint}] ({prefix.strip()}):\n{plan}")
+        except Exception as e:
+            logger.info(f"Could not explain slow query [{fingerprint}]: {e!r}")
+
+    async def drain(self):
+        """
+        Waits for the explains in flight (shutdown, scripts).
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_SECONDS,
+    settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    settings.SLOW_QUERY_MAX_CONCURRENT_EXPLAINS,
+)
+gauge("db_slow_queries_total", "Statements slower than SLOW_QUERY_SECONDS", lambda: slow_query_log.slow_count, kind="counter")
+gauge("db_slow_queries_explained_total", "Slow statements whose plan was captured", lambda: slow_query_log.explained, kind="counter")
@@ -1,13 +1,196 @@
-from sqlalchemy.ext.asyncio import create_async_engine
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.metrics import gauge, histogram
 
-engine = create_async_engine(settings.DATABASE_URI, echo=True, future=True)
+logger = logging.getLogger(__name__)
+
+pool_wait_seconds = histogram("db_pool_wait_seconds", "Time waiting to check a connection out of the pool")
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default async pool, timing each checkout: long waits mean the pool
+    is too small for the load (or connections are held too long).
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - started)
+
+
+def engine_options() -> dict:
+    """
+    create_async_engine() keyword arguments from Settings.
+    """
+    connect_args = {
+        # SQLAlchemy's own cache of asyncpg prepared statements per connection
+        "prepared_statement_cache_size": 0 if settings.DB_PGBOUNCER_MODE else settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_MODE:
+        # Transaction pooling: server side prepared statements can't be reused
+        # across transactions, and PgBouncer rejects unknown startup parameters
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            # Client side instead (asyncpg cancels the query)
+            connect_args["command_timeout"] = settings.DB_STATEMENT_TIMEOUT_MS / 1000
+    elif settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    return {
+        "echo": settings.DB_ECHO,
+        "future": True,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(settings.DATABASE_URI, **engine_options())
+instrument_engine(engine)
+gauge("db_pool_checked_out", "Connections currently checked out of the primary pool", lambda: engine.sync_engine.pool.checkedout())
+gauge("db_pool_overflow", "Connections beyond pool_size on the primary (negative while filling)", lambda: engine.sync_engine.pool.overflow())
+
+# The one session factory: API requests, workers, scripts
+async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
         yield session
+
+# Seconds the replica is behind. 0 when it has replayed everything it
+# received (an idle primary writes nothing new), and for a server that is
+# not a standby at all. NULL for a standby that is not streaming.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        -- A standby whose WAL receiver stopped has replayed all it received
+        -- and would look current forever. Without pg_read_all_stats only
+        -- the pid is visible, which still tells whether a receiver runs.
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE pid IS NOT NULL AND COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """
+    Hands out replica sessions while the replica is reachable and within
+    max_lag_seconds of the primary, primary sessions otherwise. The lag is
+    measured at most once per check_interval, outside of any request
+    transaction, and within probe_timeout. Only one request runs the check;
+    the others keep using the last result meanwhile.
+    """
+
+    def __init__(self, replica_engine: Optional[AsyncEngine], max_lag_seconds: float, check_interval: float, probe_timeout: float):
+        self.engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.session_factory = (
+            sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False) if replica_engine else None
+        )
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def use_replica(self) -> bool:
+        if self.engine is None:
+            return False
+        if time.monotonic() - self._checked_at >= self.check_interval and not self._lock.locked():
+            async with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    await self._check()
+        return self.healthy
+
+    async def _check(self):
+        try:
+            async with asyncio.timeout(self.probe_timeout):
+                async with self.engine.connect() as conn:
+                    lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+            self.lag_seconds = float(lag) if lag is not None else None
+            healthy = lag is not None and self.lag_seconds <= self.max_lag_seconds
+            if not healthy and self.healthy:
+                if lag is None:
+                    logger.warning("Replica is not streaming from the primary, reading from the primary")
+                else:
+                    logger.warning(f"Replica is {self.lag_seconds:.1f}s behind, reading from the primary")
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Replica unavailable, reading from the primary: {e!r}")
+            self.lag_seconds = None
+            healthy = False
+        self.healthy = healthy
+        self._checked_at = time.monotonic()
+
+
+replica_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URI, **engine_options()) if settings.DATABASE_REPLICA_URI else None
+)
+replica_router = ReplicaRouter(
+    replica_engine,
+    settings.REPLICA_MAX_LAG_SECONDS,
+    settings.REPLICA_LAG_CHECK_SECONDS,
+    settings.REPLICA_PROBE_TIMEOUT_SECONDS,
+)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+    gauge("db_replica_healthy", "1 while reads are routed to the replica", lambda: int(replica_router.healthy))
+    gauge("db_replica_lag_seconds", "Last measured replica lag", lambda: replica_router.lag_seconds)
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only work that tolerates replication lag. Anything that
+    writes, or must see a write it just made, uses async_session instead.
+    """
+    factory = replica_router.session_factory if await replica_router.use_replica() else async_session
+    async with factory() as session:
+        yield session
+
+async def get_read_session() -> AsyncSession:
+    async with read_session() as session:
+        yield session
+
+def pool_stats(engine=engine) -> dict:
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Connections opened beyond pool_size (negative while the pool fills up)
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "wait_seconds": pool_wait_seconds.snapshot(),
+    }
+
+def replica_stats() -> dict:
+    return {
+        "configured": replica_engine is not None,
+        "healthy": replica_router.healthy,
+        "lag_seconds": replica_router.lag_seconds,
+        "max_lag_seconds": replica_router.max_lag_seconds,
+        "pool": pool_stats(replica_engine) if replica_engine is not None else None,
+    }
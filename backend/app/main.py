@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core.instrumentation import RequestStats, current_request, record_request, route_template
+from app.core.metrics import render_prometheus
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -9,13 +13,10 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def seed_data():
-    from app.db.session import engine
+    from app.db.session import async_session
     from app.models.base_entities import Agency
     from sqlmodel import select
-    from sqlmodel.ext.asyncio.session import AsyncSession
-    from sqlalchemy.orm import sessionmaker
-    
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
     async with async_session() as session:
         # Check if any agency exists
         result = await session.execute(select(Agency))
@@ -25,6 +26,22 @@ async def seed_data():
             await session.commit()
             print("Auto-seeded default agency ID 1")
 
+@app.on_event("startup")
+async def start_message_workers():
+    from app.services.message_queue import message_queue
+    await message_queue.start()
+    # Imported here so its /metrics gauges exist before the first message
+    import app.services.openai_service  # noqa: F401
+
+@app.on_event("shutdown")
+async def stop_message_workers():
+    from app.services.message_queue import message_queue
+    await message_queue.stop()
+    from app.services.whatsapp import whatsapp_service
+    await whatsapp_service.close()
+    from app.core.slow_queries import slow_query_log
+    await slow_query_log.drain()
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -33,12 +50,37 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """
+    Latency, SQL statement count and DB time per route template (so
+    /tenants/1 and /tenants/2 share a series); slow requests are logged
+    with their slowest statements.
+    """
+    stats = RequestStats(scope=request.scope)
+    token = current_request.set(stats)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        current_request.reset(token)
+        record_request(request.method, route_template(request.scope), status, time.perf_counter() - started, stats)
+
 from app.api.v1.api import api_router
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus scrape endpoint
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
@@ -1,3 +1,3 @@
 from .base_entities import Agency, User, Tenant, Property
-from .financial import Contract, MonthlyCharge
+from .financial import Contract, MonthlyCharge, TenantBalance, ChargeNotification
 from .payments import Payment, PaymentAllocation
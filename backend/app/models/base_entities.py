@@ -1,7 +1,12 @@
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Column, Computed, Index, String
 from sqlmodel import SQLModel, Field, Relationship
 
+# Trailing digits compared when matching a WhatsApp number to Tenant.phone:
+# the national number (area code + subscriber), whatever prefixes were typed
+PHONE_KEY_DIGITS = 10
+
 # Base Models with common fields
 class TimeStampedModel(SQLModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -39,8 +44,18 @@ class TenantBase(SQLModel):
     address: Optional[str] = None
     
 class Tenant(TenantBase, TimeStampedModel, table=True):
+    __table_args__ = (
+        Index("ix_tenant_full_name_id", "full_name", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     unique_link_token: str = Field(unique=True, index=True) # For portal access
+    # Maintained by Postgres from phone; see app.services.tenant_context.phone_key
+    phone_key: Optional[str] = Field(default=None, sa_column=Column(
+        String,
+        Computed(f"right(regexp_replace(phone, '[^0-9]', '', 'g'), {PHONE_KEY_DIGITS})"),
+        index=True,
+    ))
     agency_id: Optional[int] = Field(default=None, foreign_key="agency.id")
     agency: Optional[Agency] = Relationship(back_populates="tenants")
     contracts: List["Contract"] = Relationship(back_populates="tenant")
@@ -1,5 +1,6 @@
 from datetime import date, datetime
 from typing import Optional, List
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import SQLModel, Field, Relationship
 from .base_entities import TimeStampedModel
 
@@ -14,7 +15,7 @@ class ContractBase(SQLModel):
 class Contract(ContractBase, TimeStampedModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     
-    tenant_id: int = Field(foreign_key="tenant.id")
+    tenant_id: int = Field(foreign_key="tenant.id", index=True)
     tenant: "Tenant" = Relationship(back_populates="contracts")
     
     property_id: int = Field(foreign_key="property.id")
@@ -41,9 +42,51 @@ class MonthlyChargeBase(SQLModel):
     is_generated: bool = True # Flag to show it was auto-generated
     
 class MonthlyCharge(MonthlyChargeBase, TimeStampedModel, table=True):
+    __table_args__ = (
+        Index("ix_monthlycharge_contract_id_due_date", "contract_id", "due_date"),
+        # Only unpaid charges: FIFO allocation and due/overdue scans
+        Index("ix_monthlycharge_pending", "contract_id", "due_date", "id", postgresql_where=text("balance_due > 0")),
+        Index("ix_monthlycharge_pending_due_date", "due_date", postgresql_where=text("balance_due > 0")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     contract_id: int = Field(foreign_key="contract.id")
     contract: Optional[Contract] = Relationship(back_populates="monthly_charges")
     
     payment_allocations: List["PaymentAllocation"] = Relationship(back_populates="charge")
+
+class TenantBalanceBase(SQLModel):
+    total_due: float = 0 # Sum of balance_due over all pending charges
+    overdue_amount: float = 0 # Part of total_due already past its due_date
+    next_due_date: Optional[date] = None # Earliest pending charge not yet due
+    last_payment_date: Optional[datetime] = None
+
+class TenantBalance(TenantBalanceBase, table=True):
+    """
+    Read model answering "how much does tenant X owe" with a primary key
+    lookup. Recomputed for the affected tenants in the same transaction that
+    creates contracts or posts payments (see BalanceService).
+    """
+    tenant_id: int = Field(foreign_key="tenant.id", primary_key=True)
+    # overdue_amount/next_due_date depend on the day they were computed for
+    computed_on: date
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ChargeNotification(SQLModel, table=True):
+    """
+    Reminder/overdue notice for a charge. The row is claimed before sending
+    and stamped with sent_at afterwards (failed sends drop their claim), so
+    dispatcher reruns and concurrent runs never notify a charge twice.
+    """
+    __table_args__ = (
+        UniqueConstraint("charge_id", "kind"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    charge_id: int = Field(foreign_key="monthlycharge.id")
+    kind: str # reminder, overdue
+    tenant_id: int = Field(foreign_key="tenant.id", index=True)
+    phone: str
+    claimed_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
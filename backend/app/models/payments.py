@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from .base_entities import TimeStampedModel
 
@@ -11,12 +12,16 @@ class PaymentBase(SQLModel):
     notes: Optional[str] = None
 
 class Payment(PaymentBase, TimeStampedModel, table=True):
+    __table_args__ = (
+        Index("ix_payment_payment_date_id", "payment_date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     
     # Can initiate a payment without a contract? Ideally no, but maybe "Unidentified"
     # For now, linking to a Tenant is enough, or directly to allocations.
     # Actually, usually payments are from a Tenant.
-    tenant_id: Optional[int] = Field(default=None, foreign_key="tenant.id")
+    tenant_id: Optional[int] = Field(default=None, foreign_key="tenant.id", index=True)
     
     allocations: List["PaymentAllocation"] = Relationship(back_populates="payment")
 
@@ -29,11 +34,21 @@ class PaymentAllocation(SQLModel, table=True):
     """
     id: Optional[int] = Field(default=None, primary_key=True)
     
-    payment_id: int = Field(foreign_key="payment.id")
+    payment_id: int = Field(foreign_key="payment.id", index=True)
     payment: Optional[Payment] = Relationship(back_populates="allocations")
     
-    charge_id: int = Field(foreign_key="monthlycharge.id")
+    charge_id: int = Field(foreign_key="monthlycharge.id", index=True)
     charge: "MonthlyCharge" = Relationship(back_populates="payment_allocations")
     
     amount_allocated: float
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Period of the allocated charge, for PaymentAllocationRead.
+    # Only usable when the charge relationship was eager loaded.
+    @property
+    def charge_month(self) -> int:
+        return self.charge.month
+
+    @property
+    def charge_year(self) -> int:
+        return self.charge.year
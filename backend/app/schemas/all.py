@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from typing import Optional, List
 from pydantic import BaseModel
-from app.models.financial import ContractBase, MonthlyChargeBase
+from app.models.financial import ContractBase, MonthlyChargeBase, TenantBalanceBase
 from app.models.payments import PaymentBase
 from app.models.base_entities import TenantBase, PropertyBase, AgencyBase
 
@@ -57,3 +57,66 @@ class PaymentAllocationRead(BaseModel):
     amount_allocated: float
     charge_month: int
     charge_year: int
+
+# --- Bulk Imports ---
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+
+class PaymentBatchItemResult(BaseModel):
+    row: int
+    status: str # posted, failed
+    tenant_id: Optional[int] = None
+    payment_id: Optional[int] = None
+    amount_allocated: float = 0
+    amount_unallocated: float = 0
+    errors: List[str] = []
+
+class PaymentBatchResult(BaseModel):
+    posted: int
+    failed: int
+    elapsed_seconds: float
+    payments_per_second: float
+    results: List[PaymentBatchItemResult] = []
+
+# --- Balances ---
+class TenantBalanceRead(TenantBalanceBase):
+    tenant_id: int
+    computed_on: date
+
+# --- Tenant Portal ---
+class PortalAllocationRead(BaseModel):
+    payment_id: int
+    payment_date: datetime
+    amount_allocated: float
+
+class PortalChargeRead(MonthlyChargeRead):
+    allocations: List[PortalAllocationRead] = []
+
+class PortalContractRead(ContractBase):
+    id: int
+    property_id: int
+    monthly_charges: List[PortalChargeRead] = []
+
+class PortalStatement(BaseModel):
+    tenant_name: str
+    total_due: float
+    overdue_amount: float
+    next_due_date: Optional[date] = None
+    generated_on: date
+    contracts: List[PortalContractRead] = []
+
+# --- Charge Notifications ---
+class NotificationDispatchResult(BaseModel):
+    kind: str
+    tenants_notified: int = 0
+    charges_notified: int = 0
+    failed: int = 0 # Tenants whose send failed; retried by the next run
+    skipped: int = 0 # Tenants without a usable phone number
+    already_claimed: int = 0 # Charges another run is handling
+    elapsed_seconds: float = 0
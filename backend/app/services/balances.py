@@ -0,0 +1,105 @@
+from datetime import date, datetime
+from typing import List, Optional, Sequence
+from sqlalchemy import bindparam, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import TenantBalance
+from app.services.locks import lock_tenants
+from app.services.change_events import TENANT_FINANCES, mark_changed
+
+# Aggregate over the tenant's pending charges only (served by the partial
+# ix_monthlycharge_pending index), so refreshing costs O(unpaid charges).
+BALANCE_AGGREGATE_SQL = """
+    SELECT t.id AS tenant_id,
+           COALESCE(SUM(mc.balance_due), 0) AS total_due,
+           COALESCE(SUM(mc.balance_due) FILTER (WHERE mc.due_date < :today), 0) AS overdue_amount,
+           MIN(mc.due_date) FILTER (WHERE mc.due_date >= :today) AS next_due_date,
+           (SELECT MAX(p.payment_date) FROM payment p WHERE p.tenant_id = t.id) AS last_payment_date
+    FROM tenant t
+    LEFT JOIN contract c ON c.tenant_id = t.id
+    LEFT JOIN monthlycharge mc ON mc.contract_id = c.id AND mc.balance_due > 0
+    {where}
+    GROUP BY t.id
+"""
+
+UPSERT_BALANCES_SQL = """
+    INSERT INTO tenantbalance (tenant_id, total_due, overdue_amount, next_due_date, last_payment_date, computed_on, updated_at)
+    SELECT tenant_id, total_due, overdue_amount, next_due_date, last_payment_date,
+           CAST(:today AS date), CAST(:now AS timestamp)
+    FROM ({aggregate}) AS computed
+    WHERE true
+    ON CONFLICT (tenant_id) DO UPDATE SET
+        total_due = excluded.total_due,
+        overdue_amount = excluded.overdue_amount,
+        next_due_date = excluded.next_due_date,
+        last_payment_date = excluded.last_payment_date,
+        computed_on = excluded.computed_on,
+        updated_at = excluded.updated_at
+"""
+
+REFRESH_TENANTS_SQL = text(
+    UPSERT_BALANCES_SQL.format(aggregate=BALANCE_AGGREGATE_SQL.format(where="WHERE t.id IN :tenant_ids"))
+).bindparams(bindparam("tenant_ids", expanding=True))
+
+REBUILD_ALL_SQL = text(UPSERT_BALANCES_SQL.format(aggregate=BALANCE_AGGREGATE_SQL.format(where="")))
+
+# Stored rows that disagree with a fresh aggregate (or are missing)
+VERIFY_SQL = text(f"""
+    SELECT computed.tenant_id,
+           stored.total_due AS stored_total_due, computed.total_due,
+           stored.overdue_amount AS stored_overdue_amount, computed.overdue_amount,
+           stored.next_due_date AS stored_next_due_date, computed.next_due_date
+    FROM ({BALANCE_AGGREGATE_SQL.format(where="")}) AS computed
+    LEFT JOIN tenantbalance stored ON stored.tenant_id = computed.tenant_id
+    WHERE stored.tenant_id IS NULL
+       OR ABS(stored.total_due - computed.total_due) > 0.005
+       OR (stored.computed_on = :today AND (
+              ABS(stored.overdue_amount - computed.overdue_amount) > 0.005
+              OR stored.next_due_date IS DISTINCT FROM computed.next_due_date
+              OR stored.last_payment_date IS DISTINCT FROM computed.last_payment_date))
+""")
+
+
+class BalanceService:
+    @staticmethod
+    async def refresh_tenants(session: AsyncSession, tenant_ids: Sequence[int]):
+        """
+        Recomputes the balance rows of the given tenants. Call it in the same
+        transaction as the write that changed their charges or payments.
+        """
+        tenant_ids = sorted(set(tenant_ids))
+        if not tenant_ids:
+            return
+        # Without the tenant lock, two concurrent writers could each upsert an
+        # aggregate that misses the other's changes
+        await lock_tenants(session, tenant_ids)
+        await session.execute(
+            REFRESH_TENANTS_SQL,
+            {"tenant_ids": tenant_ids, "today": date.today(), "now": datetime.utcnow()},
+        )
+        mark_changed(session, TENANT_FINANCES, tenant_ids)
+
+    @staticmethod
+    async def get_balance(session: AsyncSession, tenant_id: int) -> Optional[TenantBalance]:
+        """
+        Primary key lookup. Rows computed on an earlier day are refreshed first,
+        since charges may have become overdue since then.
+        """
+        balance = await session.get(TenantBalance, tenant_id)
+        if balance is None or balance.computed_on < date.today():
+            await BalanceService.refresh_tenants(session, [tenant_id])
+            await session.commit()
+            balance = await session.get(TenantBalance, tenant_id, populate_existing=True)
+        return balance
+
+    @staticmethod
+    async def rebuild_all(session: AsyncSession):
+        await session.execute(REBUILD_ALL_SQL, {"today": date.today(), "now": datetime.utcnow()})
+
+    @staticmethod
+    async def verify(session: AsyncSession) -> List:
+        """
+        Returns the tenants whose stored balance differs from the charges.
+        Time dependent fields are only compared for rows computed today.
+        """
+        result = await session.execute(VERIFY_SQL, {"today": date.today()})
+        return result.all()
@@ -0,0 +1,49 @@
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Kinds of change caches subscribe to
+TENANT_FINANCES = "tenant_finances" # ids: tenant ids whose charges/payments changed
+PROPERTIES = "properties" # ids: property ids inserted, updated or deleted
+
+_INFO_KEY = "pending_change_events"
+_subscribers: Dict[str, List[Callable[[Set[Hashable]], None]]] = defaultdict(list)
+
+
+def mark_changed(session, kind: str, ids: Iterable[Hashable]):
+    """
+    Records that the current transaction changed these rows. Subscribers are
+    notified once it commits, so caches are never refilled with data from
+    before the commit; a rollback discards the marks.
+    """
+    session.info.setdefault(_INFO_KEY, defaultdict(set))[kind].update(ids)
+
+
+def on_change(kind: str, callback: Callable[[Set[Hashable]], None]):
+    """
+    Registers callback(ids) to run after each commit that changed `kind`.
+    """
+    _subscribers[kind].append(callback)
+    return callback
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session):
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    for kind, ids in pending.items():
+        for callback in _subscribers[kind]:
+            try:
+                callback(ids)
+            except Exception as e:
+                logger.error(f"Change subscriber {callback!r} for {kind} failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop(_INFO_KEY, None)
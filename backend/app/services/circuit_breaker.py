@@ -0,0 +1,72 @@
+import time
+from typing import NamedTuple, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Ticket(NamedTuple):
+    trial: int # Id of the half-open trial this call is, 0 for an ordinary call
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    are refused without touching the upstream. After `reset_seconds` one
+    trial call is let through (half open): success closes the circuit,
+    failure opens it again.
+
+    allow() hands out a Ticket that the caller passes back with the outcome.
+    Once the circuit has opened, only the trial's outcome moves it: calls
+    admitted earlier that finish late are ignored. Callers run release() in
+    a finally so a trial that ends without a verdict (cancelled) does not
+    block the next one.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trials = 0
+        self._trial_in_flight = 0 # Id of the running trial, 0 if none
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> Optional[Ticket]:
+        state = self.state
+        if state == CLOSED:
+            return Ticket(0)
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trials += 1
+            self._trial_in_flight = self._trials
+            return Ticket(self._trials)
+        return None
+
+    def _counts(self, ticket: Ticket) -> bool:
+        if self.failures < self.failure_threshold:
+            return True
+        return ticket.trial != 0 and ticket.trial == self._trial_in_flight
+
+    def record_success(self, ticket: Ticket):
+        if self._counts(ticket):
+            self.failures = 0
+            self.release(ticket)
+
+    def record_failure(self, ticket: Ticket):
+        if self._counts(ticket):
+            self.failures += 1
+            self.release(ticket)
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self, ticket: Ticket):
+        if ticket.trial and ticket.trial == self._trial_in_flight:
+            self._trial_in_flight = 0
@@ -0,0 +1,101 @@
+import logging
+from typing import AsyncIterator, List, Tuple
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Contract
+from app.schemas.all import ContractCreate, ImportResult, ImportRowError
+from app.services.balances import BalanceService
+from app.services.contracts import ContractService
+from app.services.row_parsers import validation_messages
+
+logger = logging.getLogger(__name__)
+
+
+async def import_contracts(
+    session: AsyncSession,
+    rows: AsyncIterator[Tuple[int, object]],
+    batch_size: int,
+) -> ImportResult:
+    """
+    Validates rows against ContractCreate and writes them in chunked
+    transactions, each one inserting its contracts and their monthly charges.
+    Only the current batch is kept in memory. A batch that fails is retried
+    row by row so that only the rows at fault are reported.
+    """
+    result = ImportResult(imported=0, failed=0)
+    batch: List[Tuple[int, ContractCreate]] = []
+
+    def fail(row_number: int, errors: List[str]):
+        result.failed += 1
+        result.errors.append(ImportRowError(row=row_number, errors=errors))
+
+    async for row_number, row in rows:
+        if not isinstance(row, dict):
+            fail(row_number, [row if isinstance(row, str) else "Row must be an object"])
+            continue
+        try:
+            contract_in = ContractCreate.model_validate(row)
+        except ValidationError as e:
+            fail(row_number, validation_messages(e))
+            continue
+
+        batch.append((row_number, contract_in))
+        if len(batch) >= batch_size:
+            await _write_batch(session, batch, result, fail)
+            batch = []
+
+    if batch:
+        await _write_batch(session, batch, result, fail)
+
+    return result
+
+
+async def _write_batch(session: AsyncSession, batch: List[Tuple[int, ContractCreate]], result: ImportResult, fail):
+    contracts = [Contract.from_orm(contract_in) for _, contract_in in batch]
+    try:
+        session.add_all(contracts)
+        await session.flush()
+        await ContractService.insert_charges(session, contracts)
+        await BalanceService.refresh_tenants(session, [contract.tenant_id for contract in contracts])
+        await session.commit()
+        result.imported += len(batch)
+    except Exception as e:
+        await session.rollback()
+        logger.warning(f"Contract import batch failed (rows {batch[0][0]}-{batch[-1][0]}), retrying row by row: {e}")
+        session.expunge_all()
+        await _write_rows(session, batch, result, fail)
+    finally:
+        # Drop the batch from the identity map so memory stays flat
+        session.expunge_all()
+
+
+async def _write_rows(session: AsyncSession, batch: List[Tuple[int, ContractCreate]], result: ImportResult, fail):
+    """
+    Slow path for a failed batch: every row in its own savepoint, so a bad
+    row (e.g. an unknown property_id) is rolled back alone and reported with
+    its own error, and the rest of the batch still goes in one commit.
+    """
+    imported: List[Tuple[int, Contract]] = []
+    for row_number, contract_in in batch:
+        contract = Contract.from_orm(contract_in)
+        try:
+            async with session.begin_nested():
+                session.add(contract)
+                await session.flush()
+                await ContractService.insert_charges(session, [contract])
+        except Exception as e:
+            fail(row_number, [str(getattr(e, 'orig', e))])
+            continue
+        imported.append((row_number, contract))
+
+    try:
+        if imported:
+            await BalanceService.refresh_tenants(session, [contract.tenant_id for _, contract in imported])
+        await session.commit()
+        result.imported += len(imported)
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Contract import batch failed (rows {batch[0][0]}-{batch[-1][0]}): {e}")
+        error = f"Batch rolled back: {getattr(e, 'orig', e)}"
+        for row_number, _ in imported:
+            fail(row_number, [error])
@@ -1,7 +1,44 @@
+import calendar
 from datetime import date
-from dateutil.relativedelta import relativedelta
+from typing import List, Tuple
+from sqlalchemy import insert
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import Contract, MonthlyCharge
+from app.services.balances import BalanceService
+
+# asyncpg caps a statement at 32767 bind parameters; with column defaults
+# filled in, each charge row binds 16 of them
+MAX_CHARGES_PER_INSERT = 1000
+
+
+def build_charge_schedule(start_date: date, end_date: date, billing_day: int) -> List[Tuple[int, int, date]]:
+    """
+    Computes the (month, year, due_date) vector for a contract in one pass.
+    Due dates fall on billing_day, clamped to the last day of short months.
+    """
+    schedule = []
+    year, month = start_date.year, start_date.month
+    # Stepping a date month by month clamps its day on short months and never
+    # recovers it (Jan 31 -> Feb 28 -> Mar 28), which decides whether the last
+    # month still falls inside end_date. Track that running day explicitly.
+    cursor_day = start_date.day
+
+    while True:
+        last_day = calendar.monthrange(year, month)[1]
+        cursor_day = min(cursor_day, last_day)
+        if date(year, month, cursor_day) > end_date:
+            break
+
+        due_day = billing_day if 1 <= billing_day <= last_day else last_day
+        schedule.append((month, year, date(year, month, due_day)))
+
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+
+    return schedule
+
 
 class ContractService:
     @staticmethod
@@ -9,37 +46,44 @@ class ContractService:
         # 1. Save Contract
         session.add(contract_data)
         await session.flush() # Get ID
-        
+
         # 2. Generate Monthly Charges
-        # Logic: Iterate from start_date to end_date
-        current_date = contract_data.start_date
-        end_date = contract_data.end_date
-        
-        charges = []
-        
-        while current_date <= end_date:
-            # Calculate due date (e.g., 5th or 10th of the month)
-            # If billing_day is 10, then due date is 10th of current_date's month
-            # Note: Need to handle invalid days (e.g. 31st in Feb)
-            try:
-                due_date = current_date.replace(day=contract_data.billing_day)
-            except ValueError:
-                # Fallback to last day of month if day is invalid
-                last_day = (current_date + relativedelta(months=1)).replace(day=1) - relativedelta(days=1)
-                due_date = last_day
-
-            charge = MonthlyCharge(
-                contract_id=contract_data.id,
-                month=current_date.month,
-                year=current_date.year,
-                due_date=due_date,
-                rent_amount=contract_data.initial_amount, # Can be adjusted by index rules later
-                total_amount=contract_data.initial_amount,
-                balance_due=contract_data.initial_amount
-            )
-            session.add(charge)
-            
-            # Move to next month
-            current_date += relativedelta(months=1)
-            
+        # The whole schedule goes out as a single multi-row INSERT ... RETURNING,
+        # so creating a contract costs the same round trips for 1 or 120 months.
+        await ContractService.insert_charges(session, [contract_data])
+
+        # 3. Keep the tenant's balance read model in step
+        await BalanceService.refresh_tenants(session, [contract_data.tenant_id])
         return contract_data
+
+    @staticmethod
+    async def insert_charges(session: AsyncSession, contracts: List[Contract]) -> List[int]:
+        """
+        Bulk inserts the monthly charges of already flushed contracts.
+        Returns the ids of the created charges.
+        """
+        rows = [
+            {
+                "contract_id": contract.id,
+                "month": month,
+                "year": year,
+                "due_date": due_date,
+                "rent_amount": contract.initial_amount, # Can be adjusted by index rules later
+                "total_amount": contract.initial_amount,
+                "balance_due": contract.initial_amount,
+            }
+            for contract in contracts
+            for month, year, due_date in build_charge_schedule(
+                contract.start_date, contract.end_date, contract.billing_day
+            )
+        ]
+        charge_ids = []
+        # Keep each statement under the driver's bind parameter limit
+        for i in range(0, len(rows), MAX_CHARGES_PER_INSERT):
+            result = await session.execute(
+                insert(MonthlyCharge)
+                .values(rows[i:i + MAX_CHARGES_PER_INSERT])
+                .returning(MonthlyCharge.id)
+            )
+            charge_ids.extend(result.scalars().all())
+        return charge_ids
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List
+
+# Rough chars-per-token for Spanish chat text, plus the per-message framing
+# the chat API adds. Close enough to budget without a tokenizer dependency.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass(slots=True)
+class Turn:
+    role: str # user, assistant
+    content: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    turns: Deque[Turn]
+    last_active: float = field(default_factory=time.monotonic)
+
+
+class ConversationStore:
+    """
+    Recent turns of each WhatsApp chat, so follow-up questions keep their
+    context. Each chat is a ring buffer of max_turns; chats idle for longer
+    than idle_ttl_seconds, or the least recently active beyond max_chats, are
+    dropped. history() trims to a token budget, newest turns first, so the
+    prompt stays bounded however long the chat gets. Memory only: a restart
+    starts every chat afresh.
+    """
+
+    def __init__(self, max_turns: int, max_chats: int, idle_ttl_seconds: int):
+        self.max_turns = max_turns
+        self.max_chats = max_chats
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._chats: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.evicted = 0
+
+    def history(self, chat_id: str, token_budget: int) -> List[Dict[str, str]]:
+        """
+        Latest turns of the chat that fit in token_budget, oldest first, as
+        chat completion messages.
+        """
+        conversation = self._chats.get(chat_id)
+        if conversation is None:
+            return []
+        if conversation.last_active + self.idle_ttl_seconds < time.monotonic():
+            del self._chats[chat_id]
+            self.evicted += 1
+            return []
+        selected, used = [], 0
+        for turn in reversed(conversation.turns):
+            if used + turn.tokens > token_budget:
+                break
+            selected.append({"role": turn.role, "content": turn.content})
+            used += turn.tokens
+        selected.reverse()
+        # Never open with an assistant reply whose question was trimmed away
+        if selected and selected[0]["role"] == "assistant":
+            selected.pop(0)
+        return selected
+
+    def add(self, chat_id: str, role: str, content: str):
+        conversation = self._chats.get(chat_id)
+        if conversation is None:
+            conversation = self._chats[chat_id] = Conversation(deque(maxlen=self.max_turns))
+        conversation.turns.append(Turn(role, content, estimate_tokens(content)))
+        conversation.last_active = time.monotonic()
+        self._chats.move_to_end(chat_id)
+        self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        # Least recently active first: stop at the first chat still in use
+        while self._chats:
+            chat_id, conversation = next(iter(self._chats.items()))
+            if len(self._chats) <= self.max_chats and conversation.last_active + self.idle_ttl_seconds >= now:
+                break
+            del self._chats[chat_id]
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        self._evict()
+        turns = sum(len(c.turns) for c in self._chats.values())
+        content_bytes = sum(len(t.content.encode()) for c in self._chats.values() for t in c.turns)
+        return {
+            "active_chats": len(self._chats),
+            "turns": turns,
+            "content_bytes": content_bytes,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,61 @@
+from typing import Sequence
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+
+# First key of the two-key advisory lock, so tenant locks do not collide with
+# other advisory locks taken on the same database
+TENANT_LOCK_NAMESPACE = 7001
+
+# Locks are always taken in ascending tenant/charge id order so that batches
+# touching several tenants cannot deadlock each other
+LOCK_TENANTS_ADVISORY_SQL = text("""
+    SELECT pg_advisory_xact_lock(:namespace, t.id)
+    FROM (SELECT DISTINCT unnest(CAST(:tenant_ids AS integer[])) AS id ORDER BY 1) t
+""")
+
+# Row mode locks the tenant rows first: the charge locks alone take nothing
+# for a tenant without pending charges. NO KEY UPDATE, not UPDATE, so it does
+# not conflict with the KEY SHARE lock that inserting a payment or contract
+# for the tenant takes through the foreign key (callers insert, then lock).
+LOCK_TENANT_ROWS_SQL = text("""
+    SELECT t.id
+    FROM tenant t
+    WHERE t.id = ANY(CAST(:tenant_ids AS integer[]))
+    ORDER BY t.id
+    FOR NO KEY UPDATE
+""")
+
+LOCK_TENANT_CHARGES_SQL = text("""
+    SELECT mc.id
+    FROM monthlycharge mc
+    JOIN contract c ON c.id = mc.contract_id
+    WHERE c.tenant_id = ANY(CAST(:tenant_ids AS integer[])) AND mc.balance_due > 0
+    ORDER BY mc.id
+    FOR UPDATE OF mc
+""")
+
+
+async def lock_tenants(session: AsyncSession, tenant_ids: Sequence[int], mode: str = None):
+    """
+    Serializes money movements per tenant until the transaction ends, so two
+    concurrent payments cannot both consume the same pending balance.
+    Work for different tenants never waits on each other.
+
+    Statements issued after the lock see, under READ COMMITTED, everything the
+    previous holder committed. Only Postgres is supported; elsewhere it is a no-op.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    mode = mode or settings.PAYMENT_LOCK_MODE
+    params = {"tenant_ids": list(tenant_ids)}
+    if mode == "advisory":
+        await session.execute(
+            LOCK_TENANTS_ADVISORY_SQL,
+            {"namespace": TENANT_LOCK_NAMESPACE, **params},
+        )
+    elif mode == "row":
+        await session.execute(LOCK_TENANT_ROWS_SQL, params)
+        await session.execute(LOCK_TENANT_CHARGES_SQL, params)
+    elif mode != "none":
+        raise ValueError(f"Unknown PAYMENT_LOCK_MODE: {mode}")
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.metrics import gauge
+from app.db.session import async_session
+from app.services.whatsapp_bot import IncomingMessage, handle_message
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept for the percentiles in stats()
+LATENCY_WINDOW = 1000
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class RecentIds:
+    """
+    LRU of recently seen message ids, each remembered for ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._expires[key]
+            return False
+        return True
+
+    def add(self, key: str):
+        self._expires[key] = time.monotonic() + self.ttl_seconds
+        self._expires.move_to_end(key)
+        while len(self._expires) > self.max_entries:
+            self._expires.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+class MessageQueue:
+    """
+    Bounded in-memory queue drained by a fixed pool of worker tasks, so the
+    webhook can acknowledge Evolution API right away. When the queue is full
+    submit() refuses the message and the webhook answers 503, letting
+    Evolution retry later instead of piling up work. Queued messages are lost
+    if the process stops; Evolution's redelivery covers unacknowledged ones.
+
+    Redelivered messages (same key.id) are dropped on submit. Messages are
+    kept in one backlog per chat and the ready queue holds chats, not
+    messages: a chat is in it at most once, so its messages are handled one
+    at a time and in order while different chats run in parallel.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Callable[[], AsyncSession], IncomingMessage], Awaitable],
+        workers: int,
+        max_size: int,
+        recent_ids: RecentIds,
+    ):
+        self.handler = handler
+        self.worker_count = workers
+        self.max_size = max_size
+        self.recent_ids = recent_ids
+        self._queue: Optional[asyncio.Queue] = None
+        self._chats: Dict[str, deque] = {}
+        self._pending = 0
+        self._workers: List[asyncio.Task] = []
+        self._session_factory = async_session
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self._wait_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self._processing_ms: deque = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [asyncio.create_task(self._work(), name=f"whatsapp-worker-{i}") for i in range(self.worker_count)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {self._pending} WhatsApp messages still queued")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, messages: List[IncomingMessage]) -> bool:
+        """
+        Enqueues the new messages of one webhook call, all or none.
+        Duplicates are only remembered once accepted, so a delivery refused
+        with 503 is processed when Evolution retries it.
+        """
+        if self._queue is None:
+            raise RuntimeError("MessageQueue.start() has not been called")
+        fresh, batch_ids = [], set()
+        for message in messages:
+            message_id = message.message_id
+            if message_id and (message_id in self.recent_ids or message_id in batch_ids):
+                self.duplicates += 1
+                continue
+            batch_ids.add(message_id)
+            fresh.append(message)
+
+        if self.max_size and self._pending + len(fresh) > self.max_size:
+            self.rejected += len(fresh)
+            return False
+        now = time.perf_counter()
+        for message in fresh:
+            if message.message_id:
+                self.recent_ids.add(message.message_id)
+            backlog = self._chats.get(message.remote_jid)
+            if backlog is None:
+                # Idle chat: schedule it. Busy ones are rescheduled by their worker
+                backlog = self._chats[message.remote_jid] = deque()
+                self._queue.put_nowait(message.remote_jid)
+            backlog.append((now, message))
+            self._pending += 1
+        return True
+
+    async def _work(self):
+        while True:
+            remote_jid = await self._queue.get()
+            backlog = self._chats[remote_jid]
+            enqueued_at, message = backlog.popleft()
+            started = time.perf_counter()
+            self._wait_ms.append((started - enqueued_at) * 1000)
+            try:
+                # The handler opens (and closes) its own session when it needs one
+                await self.handler(self._session_factory, message)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing WhatsApp message {message.message_id}: {e}")
+            finally:
+                self._processing_ms.append((time.perf_counter() - started) * 1000)
+                self._pending -= 1
+                # Back of the line, so one busy chat can't hold a worker forever
+                if backlog:
+                    self._queue.put_nowait(remote_jid)
+                else:
+                    del self._chats[remote_jid]
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        wait, processing = list(self._wait_ms), list(self._processing_ms)
+        return {
+            "depth": self._pending,
+            "active_chats": len(self._chats),
+            "max_size": self.max_size,
+            "workers": len(self._workers),
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "wait_ms": {"p50": percentile(wait, 50), "p95": percentile(wait, 95)},
+            "processing_ms": {"p50": percentile(processing, 50), "p95": percentile(processing, 95), "max": max(processing, default=None)},
+        }
+
+
+message_queue = MessageQueue(
+    handle_message,
+    settings.WHATSAPP_WORKERS,
+    settings.WHATSAPP_QUEUE_MAX_SIZE,
+    RecentIds(settings.WHATSAPP_DEDUPE_MAX_ENTRIES, settings.WHATSAPP_DEDUPE_TTL_SECONDS),
+)
+gauge("whatsapp_queue_depth", "Messages waiting for a worker", lambda: message_queue.stats()["depth"])
+gauge("whatsapp_messages_processed_total", "Messages handled", lambda: message_queue.processed, kind="counter")
+gauge("whatsapp_messages_failed_total", "Messages whose handling raised", lambda: message_queue.failed, kind="counter")
+gauge("whatsapp_messages_rejected_total", "Messages refused with 503 (queue full)", lambda: message_queue.rejected, kind="counter")
+gauge("whatsapp_messages_duplicate_total", "Redelivered messages dropped", lambda: message_queue.duplicates, kind="counter")
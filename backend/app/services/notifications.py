@@ -0,0 +1,181 @@
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List
+from sqlalchemy import Integer, and_, any_, bindparam, delete, exists, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.models import ChargeNotification, Contract, MonthlyCharge, Tenant
+from app.schemas.all import NotificationDispatchResult
+from app.services.whatsapp import whatsapp_service
+
+REMINDER = "reminder"
+OVERDUE = "overdue"
+NOTIFICATION_KINDS = (REMINDER, OVERDUE)
+
+# asyncpg caps a statement at 32767 bind parameters; each claim row binds 5
+MAX_CLAIMS_PER_INSERT = 5000
+
+
+@dataclass
+class TenantNotice:
+    tenant_id: int
+    full_name: str
+    phone: str
+    charges: List = field(default_factory=list)
+
+
+def normalize_phone(phone: str) -> str:
+    return re.sub(r"\D", "", phone or "")
+
+
+def charge_ids_param(ids: List[int]):
+    return bindparam("charge_ids", ids, type_=ARRAY(Integer))
+
+
+def render_notice(kind: str, notice: TenantNotice) -> str:
+    lines = "".join(
+        f"\n- {c.month:02d}/{c.year}: ${c.balance_due:,.2f} (vence {c.due_date:%d/%m/%Y})" for c in notice.charges
+    )
+    total = sum(c.balance_due for c in notice.charges)
+    if kind == REMINDER:
+        return f"Hola {notice.full_name}! 👋 Te recordamos que tenés cuotas por vencer:{lines}\nTotal: ${total:,.2f}"
+    return (
+        f"Hola {notice.full_name}. Registramos cuotas vencidas pendientes de pago:{lines}\n"
+        f"Total adeudado: ${total:,.2f}\nSi ya pagaste, por favor ignorá este mensaje."
+    )
+
+
+def due_charges_query(kind: str, today: date):
+    """
+    Pending charges to notify, with their tenant, ordered by tenant so each
+    tenant gets one message. Charges already notified are left out.
+    """
+    if kind == REMINDER:
+        window = and_(
+            MonthlyCharge.due_date >= today,
+            MonthlyCharge.due_date <= today + timedelta(days=settings.REMINDER_DAYS_BEFORE_DUE),
+        )
+    else:
+        window = MonthlyCharge.due_date < today
+    notified = exists().where(
+        ChargeNotification.charge_id == MonthlyCharge.id,
+        ChargeNotification.kind == kind,
+        ChargeNotification.sent_at.is_not(None),
+    )
+    return (
+        select(
+            MonthlyCharge.id, MonthlyCharge.month, MonthlyCharge.year, MonthlyCharge.due_date, MonthlyCharge.balance_due,
+            Tenant.id.label("tenant_id"), Tenant.full_name, Tenant.phone,
+        )
+        .join(Contract, Contract.id == MonthlyCharge.contract_id)
+        .join(Tenant, Tenant.id == Contract.tenant_id)
+        .where(MonthlyCharge.balance_due > 0, window, ~notified)
+        .order_by(Tenant.id, MonthlyCharge.due_date, MonthlyCharge.id)
+    )
+
+
+class NotificationService:
+    @staticmethod
+    async def dispatch(kind: str, batch_size: int = None) -> NotificationDispatchResult:
+        """
+        Sends one WhatsApp message per tenant listing its due (or overdue)
+        charges. Charges are streamed through a server-side cursor on their
+        own connection, while each batch of tenants is claimed, sent and
+        recorded through a separate session, so memory stays flat and the
+        work done survives an interrupted run.
+        """
+        if kind not in NOTIFICATION_KINDS:
+            raise ValueError(f"Unknown notification kind: {kind}")
+        batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        result = NotificationDispatchResult(kind=kind)
+        started = time.perf_counter()
+
+        stmt = due_charges_query(kind, date.today()).execution_options(yield_per=batch_size)
+        async with engine.connect() as stream_conn, async_session() as session:
+            rows = await stream_conn.stream(stmt)
+            batch: List[TenantNotice] = []
+            current = None
+            async for row in rows:
+                if current is None or current.tenant_id != row.tenant_id:
+                    if len(batch) >= batch_size:
+                        await NotificationService._send_batch(session, kind, batch, result)
+                        batch = []
+                    current = TenantNotice(row.tenant_id, row.full_name, normalize_phone(row.phone))
+                    batch.append(current)
+                current.charges.append(row)
+            if batch:
+                await NotificationService._send_batch(session, kind, batch, result)
+
+        result.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return result
+
+    @staticmethod
+    async def _send_batch(session: AsyncSession, kind: str, notices: List[TenantNotice], result: NotificationDispatchResult):
+        skipped = [n for n in notices if not n.phone]
+        result.skipped += len(skipped)
+        notices = [n for n in notices if n.phone]
+        if not notices:
+            return
+
+        # 1. Claim the charges. A claim left unsent by a crashed run can be
+        # retaken once it is older than the timeout
+        now = datetime.utcnow()
+        stale_before = now - timedelta(minutes=settings.NOTIFICATION_CLAIM_TIMEOUT_MINUTES)
+        rows = [
+            {"charge_id": c.id, "kind": kind, "tenant_id": n.tenant_id, "phone": n.phone, "claimed_at": now}
+            for n in notices for c in n.charges
+        ]
+        claimed = set()
+        for i in range(0, len(rows), MAX_CLAIMS_PER_INSERT):
+            claim = insert(ChargeNotification).values(rows[i:i + MAX_CLAIMS_PER_INSERT])
+            claim = claim.on_conflict_do_update(
+                index_elements=["charge_id", "kind"],
+                set_={"claimed_at": claim.excluded.claimed_at, "phone": claim.excluded.phone},
+                where=and_(ChargeNotification.sent_at.is_(None), ChargeNotification.claimed_at < stale_before),
+            ).returning(ChargeNotification.charge_id)
+            claimed.update((await session.execute(claim)).scalars().all())
+        await session.commit()
+
+        for notice in notices:
+            total = len(notice.charges)
+            notice.charges = [c for c in notice.charges if c.id in claimed]
+            result.already_claimed += total - len(notice.charges)
+        notices = [n for n in notices if n.charges]
+        if not notices:
+            return
+
+        # 2. Send
+        responses = await whatsapp_service.send_many(
+            [(n.phone, render_notice(kind, n)) for n in notices],
+            concurrency=settings.NOTIFICATION_SEND_CONCURRENCY,
+        )
+
+        # 3. Record: stamp what went out, release the claims of failed sends.
+        # The ids travel as one array parameter, however many there are
+        sent_ids, failed_ids = [], []
+        for notice, response in zip(notices, responses):
+            charge_ids = [c.id for c in notice.charges]
+            if response is None:
+                failed_ids.extend(charge_ids)
+                result.failed += 1
+            else:
+                sent_ids.extend(charge_ids)
+                result.tenants_notified += 1
+                result.charges_notified += len(charge_ids)
+        if sent_ids:
+            await session.execute(
+                update(ChargeNotification)
+                .where(ChargeNotification.kind == kind, ChargeNotification.charge_id == any_(charge_ids_param(sent_ids)))
+                .values(sent_at=datetime.utcnow())
+            )
+        if failed_ids:
+            await session.execute(
+                delete(ChargeNotification)
+                .where(ChargeNotification.kind == kind, ChargeNotification.charge_id == any_(charge_ids_param(failed_ids)))
+            )
+        await session.commit()
@@ -1,52 +1,193 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.instrumentation import record_outbound
+from app.core.metrics import gauge, histogram
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.text import normalize_text
 import logging
 
 logger = logging.getLogger(__name__)
 
+NOT_CONNECTED_REPLY = "Lo siento, mi cerebro de IA no está conectado actualmente."
+ERROR_REPLY = "Tuve un pequeño problema técnico intentando pensar mi respuesta. ¿Podrías intentar de nuevo en un momento?"
+BUSY_REPLY = "Estoy recibiendo muchas consultas en este momento 🙏 ¿Podrías escribirme de nuevo en unos minutos?"
+# Canned answers given instead of a completion
+FALLBACK_REPLIES = {NOT_CONNECTED_REPLY, ERROR_REPLY, BUSY_REPLY}
+
+wait_seconds = histogram("openai_wait_seconds", "Time waiting for an OpenAI concurrency slot")
+
+class ResponseCache:
+    """
+    LRU of AI answers keyed on (normalized message, hash of the property
+    context). The context is what the catalog offers for that question, so
+    every user asking it shares the entry, and a catalog change yields new
+    keys while old answers simply age out. Answers built on per-user data
+    are never stored here.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(user_message: str, context: str) -> Tuple[str, str]:
+        return normalize_text(user_message), hashlib.sha1(context.encode()).hexdigest()
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple[str, str], response: str):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
 class OpenAIService:
-    def __init__(self):
+    def __init__(self, client=None):
         self.api_key = settings.OPENAI_API_KEY
-        if not self.api_key:
+        self.cache = ResponseCache(settings.OPENAI_CACHE_MAX_ENTRIES, settings.OPENAI_CACHE_TTL_SECONDS)
+        self.timeout = settings.OPENAI_TIMEOUT_SECONDS
+        self.queue_timeout = settings.OPENAI_QUEUE_TIMEOUT_SECONDS
+        self.semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(settings.OPENAI_BREAKER_FAILURES, settings.OPENAI_BREAKER_RESET_SECONDS)
+        if client is not None:
+            # Injected client (tests, benchmarks)
+            self.client = client
+        elif not self.api_key:
             logger.warning("OPENAI_API_KEY is not set in settings! AI features will be disabled.")
             self.client = None
         else:
             logger.info("OpenAI client initialized with API key.")
-            self.client = AsyncOpenAI(api_key=self.api_key)
+            # Our own deadline bounds the call; one client retry at most fits in it
+            self.client = AsyncOpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=1)
 
-    async def generate_response(self, user_message: str, context: str = "") -> str:
+    async def generate_response(
+        self,
+        user_message: str,
+        context: str = "",
+        history: List[Dict[str, str]] = (),
+        user_context: str = "",
+    ) -> str:
         """
         Generates a response using OpenAI GPT-4o or GPT-3.5-turbo.
+        context: shared context (available properties).
+        history: earlier turns of the chat ({"role", "content"}), oldest first.
+        user_context: data about this user (name, tenant balance).
+
+        Only answers without user_context or history go through the cache.
+
+        At most OPENAI_MAX_CONCURRENCY calls run at once; a caller waits up to
+        OPENAI_QUEUE_TIMEOUT_SECONDS for a slot and the call itself has
+        OPENAI_TIMEOUT_SECONDS. Repeated call failures open the circuit
+        breaker: callers then get BUSY_REPLY at once instead of waiting.
         """
         if not self.client:
-            return "Lo siento, mi cerebro de IA no está conectado actualmente."
+            return NOT_CONNECTED_REPLY
 
+        cache_key = None
+        if not user_context and not history:
+            cache_key = self.cache.key(user_message, context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        full_context = "\n\n".join(part for part in (user_context, context) if part)
         system_prompt = f"""
         Eres 'InmoneaBot', un asistente virtual inteligente para una inmobiliaria.
         Tu objetivo es ayudar a inquilinos y clientes potenciales de manera amable, profesional y eficiente.
         
-        Contexto del usuario: {context}
+        Contexto del usuario: {full_context}
 
         Instrucciones:
         1. Responde preguntas sobre propiedades, alquileres y pagos.
-        2. Si un inquilino pregunta por su deuda, intenta responder basándote en el contexto (próximamente conectado a DB).
+        2. Si un inquilino pregunta por su deuda, responde con los datos de "Inquilino registrado" del contexto. Si el contexto no los incluye, su número no está registrado como inquilino: pídele que contacte a la inmobiliaria.
         3. Sé conciso y directo. Usa emojis ocasionalmente para ser amigable.
         4. Si no sabes la respuesta, ofrece contactar a un humano.
         """
 
+        ticket = self.breaker.allow()
+        if ticket is None:
+            return BUSY_REPLY
+
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo", # Or gpt-4o if available/preferred
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=300,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content.strip()
+            waiting = time.perf_counter()
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await self.semaphore.acquire()
+            except TimeoutError:
+                # Our own backlog, not an upstream failure: the breaker is left alone
+                logger.warning(f"No OpenAI slot free after {self.queue_timeout}s")
+                return BUSY_REPLY
+
+            started = time.perf_counter()
+            wait_seconds.observe(started - waiting)
+            try:
+                async with asyncio.timeout(self.timeout):
+                    response = await self.client.chat.completions.create(
+                        model="gpt-3.5-turbo", # Or gpt-4o if available/preferred
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            *history,
+                            {"role": "user", "content": user_message}
+                        ],
+                        max_tokens=300,
+                        temperature=0.7,
+                    )
+            finally:
+                self.semaphore.release()
+                record_outbound("openai", time.perf_counter() - started)
+            answer = response.choices[0].message.content.strip()
+        except TimeoutError:
+            self.breaker.record_failure(ticket)
+            logger.error(f"OpenAI API timed out after {self.timeout}s")
+            return ERROR_REPLY
         except Exception as e:
+            self.breaker.record_failure(ticket)
             logger.error(f"OpenAI API Error: {e}")
-            return "Tuve un pequeño problema técnico intentando pensar mi respuesta. ¿Podrías intentar de nuevo en un momento?"
+            return ERROR_REPLY
+        else:
+            self.breaker.record_success(ticket)
+        finally:
+            # Frees the half-open trial when the call ended without a verdict (cancelled, no slot)
+            self.breaker.release(ticket)
+
+        # Error fallbacks are not cached
+        if cache_key is not None:
+            self.cache.put(cache_key, answer)
+        return answer
 
 openai_service = OpenAIService()
+gauge("openai_circuit_open", "1 while the OpenAI circuit breaker refuses calls", lambda: int(openai_service.breaker.state == "open"))
+gauge("openai_cache_hits_total", "AI response cache hits", lambda: openai_service.cache.hits, kind="counter")
+gauge("openai_cache_misses_total", "AI response cache misses", lambda: openai_service.cache.misses, kind="counter")
@@ -1,7 +1,111 @@
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Sequence, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import text
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from app.models import Payment, MonthlyCharge, PaymentAllocation, Contract
+from app.models import Payment, MonthlyCharge, PaymentAllocation, Contract, Tenant
+from app.schemas.all import PaymentCreate, PaymentBatchItemResult, PaymentBatchResult
+from app.services.balances import BalanceService
+from app.services.locks import lock_tenants
+from app.services.row_parsers import validation_messages
+
+logger = logging.getLogger(__name__)
+
+# FIFO split done entirely in Postgres: the running sum of balance_due (oldest
+# due_date first) tells how much of the payment is consumed before each charge,
+# so every charge gets LEAST(balance_due, amount - consumed_before). Allocations
+# are inserted and balances updated by the same statement. Arithmetic runs in
+# NUMERIC so cents do not pick up float rounding along the way.
+ALLOCATE_FIFO_SQL = text("""
+    WITH pending AS (
+        SELECT mc.id,
+               mc.balance_due::numeric AS balance_due,
+               SUM(mc.balance_due::numeric) OVER (ORDER BY mc.due_date, mc.id) AS running_total
+        FROM monthlycharge mc
+        JOIN contract c ON c.id = mc.contract_id
+        WHERE c.tenant_id = :tenant_id AND mc.balance_due > 0
+    ),
+    allocated AS (
+        SELECT id AS charge_id,
+               balance_due,
+               LEAST(balance_due, CAST(:amount AS numeric) - (running_total - balance_due)) AS amount_allocated
+        FROM pending
+        WHERE running_total - balance_due < CAST(:amount AS numeric)
+    ),
+    inserted AS (
+        INSERT INTO paymentallocation (payment_id, charge_id, amount_allocated, created_at)
+        SELECT CAST(:payment_id AS integer), charge_id, amount_allocated, CAST(:created_at AS timestamp)
+        FROM allocated
+    )
+    UPDATE monthlycharge mc
+    SET balance_due = allocated.balance_due - allocated.amount_allocated,
+        status = CASE WHEN allocated.balance_due - allocated.amount_allocated <= 0
+                      THEN 'paid' ELSE 'partial' END
+    FROM allocated
+    WHERE mc.id = allocated.charge_id
+""")
+
+# Batch posting reads the pending charges of all the chunk's tenants once,
+# splits the payments over them in memory (Decimal), then writes every
+# allocation and every touched balance with one statement each. Rows travel
+# as arrays so no chunk size runs into the bind parameter limit.
+PENDING_CHARGES_SQL = text("""
+    SELECT mc.id, c.tenant_id, mc.balance_due::numeric AS balance_due
+    FROM monthlycharge mc
+    JOIN contract c ON c.id = mc.contract_id
+    WHERE c.tenant_id = ANY(CAST(:tenant_ids AS integer[])) AND mc.balance_due > 0
+    ORDER BY c.tenant_id, mc.due_date, mc.id
+""")
+
+INSERT_ALLOCATIONS_SQL = text("""
+    INSERT INTO paymentallocation (payment_id, charge_id, amount_allocated, created_at)
+    SELECT a.payment_id, a.charge_id, a.amount_allocated, CAST(:created_at AS timestamp)
+    FROM unnest(CAST(:payment_ids AS integer[]), CAST(:charge_ids AS integer[]), CAST(:amounts AS numeric[]))
+        AS a(payment_id, charge_id, amount_allocated)
+""")
+
+UPDATE_CHARGE_BALANCES_SQL = text("""
+    UPDATE monthlycharge mc
+    SET balance_due = v.balance_due,
+        status = CASE WHEN v.balance_due <= 0 THEN 'paid' ELSE 'partial' END
+    FROM unnest(CAST(:charge_ids AS integer[]), CAST(:balances AS numeric[])) AS v(id, balance_due)
+    WHERE mc.id = v.id
+""")
+
+
+@dataclass
+class PendingCharge:
+    id: int
+    balance_due: Decimal
+
+
+def allocate_fifo(pending_charges: Sequence[Union[MonthlyCharge, PendingCharge]], amount: Union[float, Decimal]) -> List[tuple]:
+    """
+    Splits amount over charges already ordered by due_date, oldest first.
+    Returns the (charge, allocated_amount) pairs; charges are not modified.
+    """
+    allocations = []
+    remaining_payment = amount
+
+    for charge in pending_charges:
+        if remaining_payment <= 0:
+            break
+
+        # Calculate how much to allocate to this charge
+        allocation_amount = min(remaining_payment, charge.balance_due)
+        allocations.append((charge, allocation_amount))
+
+        # Decrement remaining payment
+        remaining_payment -= allocation_amount
+
+    return allocations
+
 
 class PaymentService:
     @staticmethod
@@ -9,31 +113,45 @@ class PaymentService:
         # 1. Save Payment
         session.add(payment_data)
         await session.flush()
-        
-        # 2. Find pending charges for the tenant
-        # We need to find all contracts for this tenant? Or assume payment is linked to a contract?
-        # Ideally payment -> Tenant -> Contracts -> Pending Charges
-        # Simplified: Get all pending charges for tenant, ordered by due_date
-        
+
+        # 2. Allocate it to the tenant's pending charges, oldest due_date first
+        await lock_tenants(session, [payment_data.tenant_id])
+        if session.get_bind().dialect.name == "postgresql":
+            await session.execute(
+                ALLOCATE_FIFO_SQL,
+                {
+                    "tenant_id": payment_data.tenant_id,
+                    "amount": Decimal(str(payment_data.amount)),
+                    "payment_id": payment_data.id,
+                    "created_at": datetime.utcnow(),
+                },
+            )
+        else:
+            await PaymentService._allocate_in_python(session, payment_data)
+
+        # 3. Keep the tenant's balance read model in step
+        await BalanceService.refresh_tenants(session, [payment_data.tenant_id])
+        return payment_data
+
+    @staticmethod
+    async def _allocate_in_python(session: AsyncSession, payment_data: Payment) -> float:
+        """
+        Reference allocation through the ORM, used on databases without
+        the window function / writable CTE support ALLOCATE_FIFO_SQL needs.
+        Returns the amount allocated.
+        """
         stmt = (
             select(MonthlyCharge)
             .join(Contract)
             .where(Contract.tenant_id == payment_data.tenant_id)
             .where(MonthlyCharge.balance_due > 0)
-            .order_by(MonthlyCharge.due_date)
+            .order_by(MonthlyCharge.due_date, MonthlyCharge.id)
         )
         result = await session.execute(stmt)
         pending_charges = result.scalars().all()
-        
-        remaining_payment = payment_data.amount
-        
-        for charge in pending_charges:
-            if remaining_payment <= 0:
-                break
-                
-            # Calculate how much to allocate to this charge
-            allocation_amount = min(remaining_payment, charge.balance_due)
-            
+
+        allocated = 0
+        for charge, allocation_amount in allocate_fifo(pending_charges, payment_data.amount):
             # Create Allocation
             allocation = PaymentAllocation(
                 payment_id=payment_data.id,
@@ -41,17 +159,168 @@ class PaymentService:
                 amount_allocated=allocation_amount
             )
             session.add(allocation)
-            
+
             # Update Charge
             charge.balance_due -= allocation_amount
             if charge.balance_due <= 0:
                 charge.status = "paid"
             else:
                 charge.status = "partial"
-            
+
             session.add(charge)
-            
-            # Decrement remaining payment
-            remaining_payment -= allocation_amount
-            
-        return payment_data
+            allocated += allocation_amount
+
+        # Later payments of the same tenant in this transaction see the new balances
+        await session.flush()
+        return allocated
+
+    @staticmethod
+    async def post_payment_batch(
+        session: AsyncSession,
+        rows: AsyncIterator[Tuple[int, object]],
+        batch_size: int,
+    ) -> PaymentBatchResult:
+        """
+        Posts many payments (e.g. a bank statement) in chunked transactions.
+        Each chunk is grouped by tenant: the pending charges of all its tenants
+        are loaded with one query and split FIFO in Decimal, payment after
+        payment in input order, then written back with one statement for the
+        allocations and one for the charge balances.
+        """
+        started = time.perf_counter()
+        results: List[PaymentBatchItemResult] = []
+        chunk: List[Tuple[int, PaymentCreate]] = []
+
+        async for row_number, row in rows:
+            if not isinstance(row, dict):
+                error = row if isinstance(row, str) else "Row must be an object"
+                results.append(PaymentBatchItemResult(row=row_number, status="failed", errors=[error]))
+                continue
+            try:
+                chunk.append((row_number, PaymentCreate.model_validate(row)))
+            except ValidationError as e:
+                results.append(PaymentBatchItemResult(row=row_number, status="failed", errors=validation_messages(e)))
+                continue
+
+            if len(chunk) >= batch_size:
+                results.extend(await PaymentService._post_chunk(session, chunk))
+                chunk = []
+
+        if chunk:
+            results.extend(await PaymentService._post_chunk(session, chunk))
+
+        results.sort(key=lambda r: r.row)
+        elapsed = time.perf_counter() - started
+        posted = sum(1 for r in results if r.status == "posted")
+        return PaymentBatchResult(
+            posted=posted,
+            failed=len(results) - posted,
+            elapsed_seconds=round(elapsed, 3),
+            payments_per_second=round(posted / elapsed, 1) if elapsed > 0 else 0,
+            results=results,
+        )
+
+    @staticmethod
+    async def _post_chunk(session: AsyncSession, chunk: List[Tuple[int, PaymentCreate]]) -> List[PaymentBatchItemResult]:
+        results = []
+        tenant_ids = sorted({payment_in.tenant_id for _, payment_in in chunk})
+
+        try:
+            known = await session.execute(select(Tenant.id).where(Tenant.id.in_(tenant_ids)))
+            known_ids = set(known.scalars().all())
+
+            by_tenant: Dict[int, List[Tuple[int, Payment]]] = defaultdict(list)
+            for row_number, payment_in in chunk:
+                if payment_in.tenant_id not in known_ids:
+                    results.append(PaymentBatchItemResult(
+                        row=row_number, status="failed", tenant_id=payment_in.tenant_id,
+                        errors=["Tenant not found"],
+                    ))
+                    continue
+                by_tenant[payment_in.tenant_id].append((row_number, Payment.from_orm(payment_in)))
+
+            await lock_tenants(session, list(by_tenant))
+
+            session.add_all(payment for payments in by_tenant.values() for _, payment in payments)
+            await session.flush()
+
+            if session.get_bind().dialect.name == "postgresql":
+                posted = await PaymentService._allocate_chunk(session, by_tenant)
+            else:
+                posted = []
+                for tenant_id, payments in by_tenant.items():
+                    for row_number, payment in payments:
+                        allocated = await PaymentService._allocate_in_python(session, payment)
+                        posted.append((row_number, tenant_id, payment, allocated))
+
+            await BalanceService.refresh_tenants(session, list(by_tenant))
+            results.extend(
+                PaymentBatchItemResult(
+                    row=row_number,
+                    status="posted",
+                    tenant_id=tenant_id,
+                    payment_id=payment.id,
+                    amount_allocated=allocated,
+                    amount_unallocated=round(payment.amount - allocated, 2),
+                )
+                for row_number, tenant_id, payment, allocated in posted
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Payment batch chunk failed (rows {chunk[0][0]}-{chunk[-1][0]}): {e}")
+            error = f"Chunk rolled back: {getattr(e, 'orig', e)}"
+            results = [
+                PaymentBatchItemResult(row=row_number, status="failed", tenant_id=payment_in.tenant_id, errors=[error])
+                for row_number, payment_in in chunk
+            ]
+        finally:
+            # Drop the chunk from the identity map so memory stays flat
+            session.expunge_all()
+
+        return results
+
+    @staticmethod
+    async def _allocate_chunk(
+        session: AsyncSession, by_tenant: Dict[int, List[Tuple[int, Payment]]]
+    ) -> List[Tuple[int, int, Payment, float]]:
+        """
+        FIFO split of a chunk's flushed payments, same arithmetic as
+        ALLOCATE_FIFO_SQL (NUMERIC) but with a single read of pending charges.
+        Returns (row_number, tenant_id, payment, allocated) per payment.
+        """
+        pending_by_tenant: Dict[int, List[PendingCharge]] = defaultdict(list)
+        result = await session.execute(PENDING_CHARGES_SQL, {"tenant_ids": list(by_tenant)})
+        for charge_id, tenant_id, balance_due in result.all():
+            pending_by_tenant[tenant_id].append(PendingCharge(charge_id, balance_due))
+
+        payment_ids, charge_ids, amounts = [], [], []
+        touched: Dict[int, PendingCharge] = {}
+        posted = []
+        for tenant_id, payments in by_tenant.items():
+            pending = pending_by_tenant[tenant_id]
+            for row_number, payment in payments:
+                allocated = Decimal(0)
+                for charge, allocation_amount in allocate_fifo(pending, Decimal(str(payment.amount))):
+                    payment_ids.append(payment.id)
+                    charge_ids.append(charge.id)
+                    amounts.append(allocation_amount)
+                    charge.balance_due -= allocation_amount
+                    touched[charge.id] = charge
+                    allocated += allocation_amount
+                # Later payments of this tenant only see what is still owed
+                pending = [charge for charge in pending if charge.balance_due > 0]
+                posted.append((row_number, tenant_id, payment, float(allocated)))
+
+        if charge_ids:
+            await session.execute(INSERT_ALLOCATIONS_SQL, {
+                "payment_ids": payment_ids,
+                "charge_ids": charge_ids,
+                "amounts": amounts,
+                "created_at": datetime.utcnow(),
+            })
+            await session.execute(UPDATE_CHARGE_BALANCES_SQL, {
+                "charge_ids": list(touched),
+                "balances": [charge.balance_due for charge in touched.values()],
+            })
+        return posted
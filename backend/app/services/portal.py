@@ -0,0 +1,147 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Set
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models import Tenant, Contract, MonthlyCharge, Payment, PaymentAllocation
+from app.schemas.all import PortalAllocationRead, PortalChargeRead, PortalContractRead, PortalStatement
+from app.services.change_events import TENANT_FINANCES, on_change
+
+
+@dataclass
+class CachedStatement:
+    tenant_id: int
+    body: bytes
+    etag: str
+    generated_on: date
+    expires_at: float
+
+
+class PortalCache:
+    """
+    In-process LRU of rendered portal statements keyed by unique_link_token.
+    Entries are dropped when their tenant's charges or payments change (after
+    commit), when the day rolls over (overdue amounts move) or after a TTL,
+    which bounds staleness for writes handled by other worker processes.
+
+    Readers take generation() before building a statement and hand it to
+    put(): if the tenant was invalidated meanwhile, the statement may predate
+    the commit and is returned without being cached.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedStatement]" = OrderedDict()
+        self._tokens_by_tenant: Dict[int, str] = {}
+        self._generation = 0
+        self._invalidated_at: Dict[int, int] = {} # tenant -> generation of its last invalidation
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, token: str) -> Optional[CachedStatement]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic() or entry.generated_on != date.today():
+                self._drop(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry
+
+    def put(self, token: str, tenant_id: int, body: bytes, generation: int) -> CachedStatement:
+        entry = CachedStatement(
+            tenant_id=tenant_id,
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+            generated_on=date.today(),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            if self._invalidated_at.get(tenant_id, -1) > generation:
+                return entry
+            self._drop(token)
+            self._entries[token] = entry
+            self._tokens_by_tenant[tenant_id] = token
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def invalidate_tenants(self, tenant_ids: Set[int]):
+        with self._lock:
+            self._generation += 1
+            for tenant_id in tenant_ids:
+                self._invalidated_at[tenant_id] = self._generation
+                token = self._tokens_by_tenant.get(tenant_id)
+                if token:
+                    self._drop(token)
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry and self._tokens_by_tenant.get(entry.tenant_id) == token:
+            del self._tokens_by_tenant[entry.tenant_id]
+
+
+portal_cache = PortalCache(settings.PORTAL_CACHE_MAX_ENTRIES, settings.PORTAL_CACHE_TTL_SECONDS)
+on_change(TENANT_FINANCES, portal_cache.invalidate_tenants)
+
+
+async def build_statement(session: AsyncSession, token: str) -> Optional[tuple]:
+    """
+    Builds the statement for a portal token from a single query: the tenant
+    outer joined with its contracts, their charges and the allocations (with
+    payment date) of each charge. Returns (tenant_id, PortalStatement) or None.
+    """
+    stmt = (
+        select(Tenant.id, Tenant.full_name, Contract, MonthlyCharge, PaymentAllocation, Payment.payment_date)
+        .outerjoin(Contract, Contract.tenant_id == Tenant.id)
+        .outerjoin(MonthlyCharge, MonthlyCharge.contract_id == Contract.id)
+        .outerjoin(PaymentAllocation, PaymentAllocation.charge_id == MonthlyCharge.id)
+        .outerjoin(Payment, Payment.id == PaymentAllocation.payment_id)
+        .where(Tenant.unique_link_token == token)
+        .order_by(Contract.start_date, Contract.id, MonthlyCharge.due_date, MonthlyCharge.id, PaymentAllocation.id)
+    )
+    rows = (await session.execute(stmt)).all()
+    if not rows:
+        return None
+
+    today = date.today()
+    contracts: Dict[int, PortalContractRead] = {}
+    charges: Dict[int, PortalChargeRead] = {}
+    for _, _, contract, charge, allocation, payment_date in rows:
+        if contract is None:
+            continue
+        if contract.id not in contracts:
+            contracts[contract.id] = PortalContractRead.model_validate(contract.model_dump())
+        if charge is None:
+            continue
+        if charge.id not in charges:
+            charges[charge.id] = PortalChargeRead.model_validate(charge.model_dump())
+            contracts[contract.id].monthly_charges.append(charges[charge.id])
+        if allocation is not None:
+            charges[charge.id].allocations.append(PortalAllocationRead(
+                payment_id=allocation.payment_id,
+                payment_date=payment_date,
+                amount_allocated=allocation.amount_allocated,
+            ))
+
+    pending = [c for c in charges.values() if c.balance_due > 0]
+    upcoming = [c.due_date for c in pending if c.due_date >= today]
+    tenant_id, tenant_name = rows[0][0], rows[0][1]
+    return tenant_id, PortalStatement(
+        tenant_name=tenant_name,
+        total_due=sum(c.balance_due for c in pending),
+        overdue_amount=sum(c.balance_due for c in pending if c.due_date < today),
+        next_due_date=min(upcoming) if upcoming else None,
+        generated_on=today,
+        contracts=list(contracts.values()),
+    )
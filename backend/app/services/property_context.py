@@ -0,0 +1,245 @@
+import asyncio
+import heapq
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.session import read_session
+from app.models.base_entities import Property
+from app.services.change_events import PROPERTIES, mark_changed, on_change
+from app.services.text import fold_text, normalize_text, tokenize
+
+# Words tenants use for each Property.type, indexed along with the type itself
+TYPE_TERMS = {
+    "apartment": ("departamento", "departamentos", "depto", "deptos", "dpto", "monoambiente", "apartamento"),
+    "house": ("casa", "casas", "chalet", "duplex"),
+    "local": ("local", "locales", "comercial", "negocio", "oficina"),
+}
+TYPE_BY_TERM = {term: type_ for type_, terms in TYPE_TERMS.items() for term in terms + (type_,)}
+
+STOPWORDS = {
+    "a", "al", "algo", "alguna", "alguno", "busco", "con", "cual", "cuales", "de", "del", "disponible",
+    "disponibles", "el", "en", "es", "hay", "hola", "la", "las", "lo", "los", "me", "mi", "para", "por",
+    "que", "quiero", "se", "sus", "tenes", "tienen", "tiene", "un", "una", "unos", "y",
+}
+
+# Numbers followed by an area unit ("50 m2", "80 metros") are not prices;
+# the first lookahead keeps the number from backtracking around the second
+PRICE = r"\$?\s*(\d[\d.,]*)(?![\d.,])(?!\s*(?:m2|mts2?|metros?)\b)\s*(k|mil|millon|millones|m)?\b"
+PRICE_RANGE_RE = re.compile(rf"entre\s+{PRICE}\s+y\s+{PRICE}")
+PRICE_MAX_RE = re.compile(rf"(?:hasta|menos de|maximo|por debajo de|no mas de)\s+{PRICE}")
+PRICE_MIN_RE = re.compile(rf"(?:desde|mas de|minimo|arriba de|por encima de)\s+{PRICE}")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def parse_price(number: str, unit: Optional[str]) -> float:
+    # "320.000" / "320,000" are thousands separators, as written in Argentina,
+    # but before a unit one separator and 1-2 digits is a decimal: "1,5 millones"
+    if unit and re.fullmatch(r"\d+[.,]\d{1,2}", number):
+        value = float(number.replace(",", "."))
+    else:
+        value = float(re.sub(r"[.,]", "", number))
+    if unit in ("k", "mil"):
+        value *= 1_000
+    elif unit in ("m", "millon", "millones"):
+        value *= 1_000_000
+    return value
+
+
+@dataclass
+class QueryHints:
+    terms: List[str]
+    cities: Set[str]
+    types: Set[str]
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+
+@dataclass
+class PropertyDoc:
+    id: int
+    line: str
+    city: str
+    type: str
+    price: Optional[float]
+    terms: Tuple[str, ...]
+    length: int
+
+
+def render_line(p: Property) -> str:
+    return f"- {p.address} ({p.city}): {p.type}, ${p.price}\n"
+
+
+class PropertyIndex:
+    """
+    In-memory BM25 index over the available properties, so the AI prompt
+    carries the top-k matches for the user's message instead of the whole
+    catalog. City, type and price hints in the message filter the candidates
+    (relaxed if nothing passes) and the remaining terms rank them.
+
+    Property commits mark the touched ids dirty and the next lookup reloads
+    just those rows (from the primary, which has them already). A full
+    rebuild every PROPERTY_CONTEXT_TTL_SECONDS picks up writes made by other
+    worker processes; that scan goes to the read replica when there is one.
+    """
+
+    def __init__(self, ttl_seconds: int, top_k: int):
+        self.ttl_seconds = ttl_seconds
+        self.top_k = top_k
+        self.version = 0
+        self._docs: Dict[int, PropertyDoc] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._cities: Dict[str, str] = {} # normalized city -> city as stored
+        self._total_length = 0
+        self._dirty: Set[int] = set()
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    # --- Maintenance ---
+
+    def invalidate(self, property_ids: Iterable[int] = ()):
+        self._dirty.update(property_ids)
+        self.version += 1
+
+    def rebuild(self, properties: Iterable[Property]):
+        self._docs, self._postings, self._cities, self._total_length = {}, {}, {}, 0
+        for p in properties:
+            self._add(p)
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        self.version += 1
+
+    def _add(self, p: Property):
+        if p.status != "available":
+            return
+        city = normalize_text(p.city)
+        terms = Counter(tokenize(f"{p.address} {p.city}") + [p.type] + list(TYPE_TERMS.get(p.type, ())))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[p.id] = tf
+        length = sum(terms.values())
+        self._docs[p.id] = PropertyDoc(p.id, render_line(p), city, p.type, p.price, tuple(terms), length)
+        self._cities.setdefault(city, p.city)
+        self._total_length += length
+
+    def _remove(self, property_id: int):
+        doc = self._docs.pop(property_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            del self._postings[term][property_id]
+            if not self._postings[term]:
+                del self._postings[term]
+
+    async def _refresh(self, session: AsyncSession):
+        if time.monotonic() >= self._expires_at:
+            self._dirty.clear()
+            async with read_session() as replica:
+                result = await replica.execute(select(Property).where(Property.status == "available"))
+                self.rebuild(result.scalars().all())
+        elif self._dirty:
+            ids, self._dirty = self._dirty, set()
+            result = await session.execute(select(Property).where(Property.id.in_(ids)))
+            for property_id in ids:
+                self._remove(property_id)
+            for p in result.scalars().all():
+                self._add(p)
+
+    async def ensure_fresh(self, session: AsyncSession):
+        if self._dirty or time.monotonic() >= self._expires_at:
+            # Single flight: a burst of messages triggers one reload
+            async with self._lock:
+                await self._refresh(session)
+
+    # --- Lookup ---
+
+    def parse_hints(self, message: str) -> QueryHints:
+        # Prices are read before punctuation is dropped ("$400.000")
+        text = fold_text(message)
+        min_price = max_price = None
+        if match := PRICE_RANGE_RE.search(text):
+            # "entre 1,2 y 1,8 millones": the unit applies to both ends
+            low, low_unit, high, high_unit = match.group(1, 2, 3, 4)
+            min_price, max_price = parse_price(low, low_unit or high_unit), parse_price(high, high_unit)
+            text = text.replace(match.group(0), " ")
+        if match := PRICE_MAX_RE.search(text):
+            max_price = parse_price(*match.group(1, 2))
+            text = text.replace(match.group(0), " ")
+        if match := PRICE_MIN_RE.search(text):
+            min_price = parse_price(*match.group(1, 2))
+            text = text.replace(match.group(0), " ")
+
+        text = normalize_text(text)
+        terms = [t for t in text.split() if t not in STOPWORDS]
+        cities = {city for city in self._cities if re.search(rf"\b{re.escape(city)}\b", text)}
+        types = {TYPE_BY_TERM[t] for t in terms if t in TYPE_BY_TERM}
+        return QueryHints(terms, cities, types, min_price, max_price)
+
+    def _matches_hints(self, doc: PropertyDoc, hints: QueryHints) -> bool:
+        if hints.cities and doc.city not in hints.cities:
+            return False
+        if hints.types and doc.type not in hints.types:
+            return False
+        if hints.min_price is not None and (doc.price is None or doc.price < hints.min_price):
+            return False
+        if hints.max_price is not None and (doc.price is None or doc.price > hints.max_price):
+            return False
+        return True
+
+    def search(self, message: str, k: int = None) -> Tuple[List[PropertyDoc], QueryHints]:
+        k = k or self.top_k
+        hints = self.parse_hints(message)
+        candidates = [doc for doc in self._docs.values() if self._matches_hints(doc, hints)] or list(self._docs.values())
+
+        # BM25 over the candidates; ties (and messages without useful terms)
+        # fall back to the newest listings
+        n = len(self._docs)
+        avg_length = self._total_length / n if n else 0
+        scores: Dict[int, float] = {}
+        for term in set(hints.terms):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                length = self._docs[doc_id].length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                )
+        if scores and not (hints.cities or hints.types or hints.min_price or hints.max_price):
+            # Only free text: listings that share no term with it are noise
+            candidates = [doc for doc in candidates if doc.id in scores] or candidates
+        top = heapq.nlargest(k, candidates, key=lambda doc: (scores.get(doc.id, 0.0), doc.id))
+        return top, hints
+
+    def render(self, message: str, k: int = None) -> str:
+        docs, _ = self.search(message, k)
+        header = "Propiedades disponibles:\n"
+        if len(docs) < len(self._docs):
+            header = f"Propiedades disponibles (mostrando {len(docs)} de {len(self._docs)}):\n"
+        return header + "".join(doc.line for doc in docs)
+
+    async def context_for(self, session: AsyncSession, message: str, k: int = None) -> str:
+        await self.ensure_fresh(session)
+        return self.render(message, k)
+
+
+property_index = PropertyIndex(settings.PROPERTY_CONTEXT_TTL_SECONDS, settings.PROPERTY_CONTEXT_TOP_K)
+on_change(PROPERTIES, property_index.invalidate)
+
+
+@event.listens_for(Property, "after_insert")
+@event.listens_for(Property, "after_update")
+@event.listens_for(Property, "after_delete")
+def _property_changed(mapper, connection, target: Property):
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, PROPERTIES, [target.id])
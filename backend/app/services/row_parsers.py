@@ -0,0 +1,77 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
+from pydantic import ValidationError
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Re-chunks a byte stream into decoded text lines without buffering the body.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields (row_number, parsed_object) for every non blank line.
+    Lines that are not valid JSON are yielded as the error message string.
+    """
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, f"Invalid JSON: {e}"
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields (row_number, dict) for every CSV record, keyed by the header line.
+    Quoted fields may not contain line breaks.
+    """
+    header = None
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells fall back to the schema defaults
+        yield row_number, {k: v for k, v in zip(header, values) if v != ""}
+
+
+async def iter_json_array_rows(items: Iterable[object]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields (row_number, item) for an already decoded JSON array.
+    """
+    for row_number, item in enumerate(items, start=1):
+        yield row_number, item
+
+
+def validation_messages(error: ValidationError) -> List[str]:
+    """
+    Flattens a pydantic ValidationError into "field: message" strings.
+    """
+    return [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors()]
+
+
+ROW_PARSERS: Dict[str, object] = {
+    "csv": iter_csv_rows,
+    "ndjson": iter_ndjson_rows,
+}
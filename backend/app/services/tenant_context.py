@@ -0,0 +1,119 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Set, Tuple
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models import Tenant, TenantBalance
+from app.models.base_entities import PHONE_KEY_DIGITS
+from app.services.balances import BalanceService
+from app.services.change_events import TENANT_FINANCES, on_change
+
+logger = logging.getLogger(__name__)
+
+
+def phone_key(phone_or_jid: str) -> str:
+    """
+    Matching key for a phone number or WhatsApp JID, the same one Postgres
+    stores in Tenant.phone_key: the last PHONE_KEY_DIGITS digits. Drops the
+    JID domain and device suffix ("5491155550001:12@s.whatsapp.net") and
+    whatever country/mobile prefixes and separators were typed.
+    """
+    number = phone_or_jid.split("@")[0].split(":")[0]
+    return re.sub(r"\D", "", number)[-PHONE_KEY_DIGITS:]
+
+
+@dataclass
+class TenantContext:
+    tenant_id: int
+    full_name: str
+    total_due: float
+    overdue_amount: float
+    next_due_date: Optional[date]
+
+    def render(self) -> str:
+        if self.total_due <= 0:
+            return f"Inquilino registrado: {self.full_name}. No tiene deuda pendiente."
+        text = f"Inquilino registrado: {self.full_name}. Deuda total: ${self.total_due:,.2f}"
+        if self.overdue_amount > 0:
+            text += f" (vencido: ${self.overdue_amount:,.2f})"
+        if self.next_due_date:
+            text += f". Próximo vencimiento: {self.next_due_date:%d/%m/%Y}"
+        return text + "."
+
+
+class TenantContextCache:
+    """
+    phone_key -> TenantContext (or None for numbers that are not tenants),
+    so repeat messages from a chat cost no query at all. A miss is one
+    indexed lookup on Tenant.phone_key joined to the tenantbalance read model.
+    Entries of a tenant are dropped when its charges or payments change;
+    unknown numbers are remembered for a shorter TTL so new tenants are
+    recognized soon after they are registered. A key shared by several
+    tenants is treated as unknown: guessing one of them could put someone
+    else's balance in the reply.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, negative_ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, date, Optional[TenantContext]]]" = OrderedDict()
+        self._keys_by_tenant: Dict[int, str] = {}
+
+    def invalidate_tenants(self, tenant_ids: Set[int]):
+        for tenant_id in tenant_ids:
+            key = self._keys_by_tenant.pop(tenant_id, None)
+            if key:
+                self._entries.pop(key, None)
+
+    def _put(self, key: str, context: Optional[TenantContext]):
+        ttl = self.ttl_seconds if context else self.negative_ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, date.today(), context)
+        self._entries.move_to_end(key)
+        if context:
+            self._keys_by_tenant[context.tenant_id] = key
+        while len(self._entries) > self.max_entries:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            if evicted and self._keys_by_tenant.get(evicted.tenant_id) == key:
+                del self._keys_by_tenant[evicted.tenant_id]
+
+    async def lookup(self, session: AsyncSession, remote_jid: str) -> Optional[TenantContext]:
+        key = phone_key(remote_jid)
+        if not key:
+            return None
+        entry = self._entries.get(key)
+        # Overdue amounts move with the date, so entries don't outlive their day
+        if entry and entry[0] > time.monotonic() and entry[1] == date.today():
+            self._entries.move_to_end(key)
+            return entry[2]
+
+        rows = (await session.execute(
+            select(Tenant.id, Tenant.full_name, TenantBalance)
+            .outerjoin(TenantBalance, TenantBalance.tenant_id == Tenant.id)
+            .where(Tenant.phone_key == key)
+            .limit(2)
+        )).all()
+        context = None
+        if len(rows) > 1:
+            logger.warning(f"Several tenants share the phone ending in {key}; answering without tenant data")
+        elif rows:
+            tenant_id, full_name, balance = rows[0]
+            if balance is None or balance.computed_on < date.today():
+                # First lookup of the day for this tenant
+                balance = await BalanceService.get_balance(session, tenant_id)
+            context = TenantContext(tenant_id, full_name, balance.total_due, balance.overdue_amount, balance.next_due_date)
+        self._put(key, context)
+        return context
+
+
+tenant_context_cache = TenantContextCache(
+    settings.TENANT_LOOKUP_CACHE_MAX_ENTRIES,
+    settings.TENANT_LOOKUP_TTL_SECONDS,
+    settings.TENANT_LOOKUP_NEGATIVE_TTL_SECONDS,
+)
+on_change(TENANT_FINANCES, tenant_context_cache.invalidate_tenants)
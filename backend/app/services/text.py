@@ -0,0 +1,23 @@
+import re
+import unicodedata
+from typing import List
+
+
+def fold_text(text: str) -> str:
+    """
+    Lowercase without accents: "Córdoba" -> "cordoba".
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Folds case, accents, punctuation and spacing, so "¿Qué departamentos
+    tienen disponibles?" and "que departamentos tienen disponibles" match.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", fold_text(text)).split())
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize_text(text).split()
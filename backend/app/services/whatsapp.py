@@ -1,10 +1,30 @@
+import asyncio
+import random
+import time
+from typing import List, Optional, Sequence, Tuple
 import httpx
 from app.core.config import settings
+from app.core.instrumentation import record_outbound
+from app.services.rate_limit import TokenBucket
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Only answers and failures that mean the message was not sent are retried.
+# 429/503 refuse the request up front. A 500/502/504, a read timeout or a
+# dropped response may come after the gateway delivered it, and Evolution API
+# takes no idempotency key, so a retry could send the tenant a duplicate
+RETRY_STATUS_CODES = {429, 503}
+RETRY_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
 class WhatsAppService:
+    """
+    Outgoing messages through Evolution API over one long-lived pooled client
+    (created on first use, closed on shutdown). Sends are paced by a token
+    bucket matching the instance's limits and retried with jittered
+    exponential backoff on 429/503 and on errors connecting.
+    """
+
     def __init__(self):
         self.base_url = f"{settings.EVOLUTION_API_URL}/message"
         self.headers = {
@@ -12,6 +32,34 @@ class WhatsAppService:
             "Content-Type": "application/json"
         }
         self.instance = settings.INSTANCE_NAME
+        self.max_retries = settings.EVOLUTION_MAX_RETRIES
+        self.rate_limiter = TokenBucket(settings.EVOLUTION_SEND_RATE_PER_SECOND, settings.EVOLUTION_SEND_BURST)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=settings.EVOLUTION_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.EVOLUTION_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.EVOLUTION_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.EVOLUTION_RETRY_MAX_DELAY_SECONDS)
+        # Full jitter: spreads retries of concurrent senders apart
+        return random.uniform(0, min(settings.EVOLUTION_RETRY_MAX_DELAY_SECONDS, 0.5 * 2 ** attempt))
 
     async def send_text_message(self, phone: str, message: str):
         """
@@ -23,16 +71,43 @@ class WhatsAppService:
             "number": phone,
             "text": message
         }
-        print(f"DEBUG: Envio a URL: {url} con Headers: {self.headers}")
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, headers=self.headers, timeout=10.0)
-                response.raise_for_status()
-                logger.info(f"WhatsApp message sent to {phone}")
-                return response.json()
-        except Exception as e:
-            print(f"DEBUG: CRITICAL ERROR: {type(e)} - {e}")
-            logger.error(f"Failed to send WhatsApp message: {e}")
-            return None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            await self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(url, json=payload)
+                record_outbound("evolution", time.perf_counter() - started)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    logger.info(f"WhatsApp message sent to {phone}")
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except RETRY_TRANSPORT_ERRORS as e:
+                record_outbound("evolution", time.perf_counter() - started)
+                error = repr(e)
+            except Exception as e:
+                logger.error(f"Failed to send WhatsApp message: {e}")
+                return None
+
+            if attempt == self.max_retries:
+                logger.error(f"Failed to send WhatsApp message after {attempt + 1} attempts: {error}")
+                return None
+            delay = self._backoff(attempt, response)
+            logger.warning(f"WhatsApp send to {phone} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def send_many(self, messages: Sequence[Tuple[str, str]], concurrency: Optional[int] = None) -> List:
+        """
+        Sends (phone, text) pairs concurrently; results follow the input order
+        (None for failed sends). Throughput is still capped by the rate limiter.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.EVOLUTION_MAX_CONNECTIONS)
+
+        async def send(phone: str, text: str):
+            async with semaphore:
+                return await self.send_text_message(phone, text)
+
+        return await asyncio.gather(*(send(phone, text) for phone, text in messages))
 
 whatsapp_service = WhatsAppService()
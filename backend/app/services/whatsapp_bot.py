@@ -0,0 +1,114 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.metrics import histogram
+from app.services.conversations import ConversationStore
+from app.services.property_context import property_index
+from app.services.tenant_context import tenant_context_cache
+from app.services.whatsapp import whatsapp_service
+
+logger = logging.getLogger(__name__)
+
+# Upstream time is in outbound_request_seconds (openai, evolution) and
+# whatsapp_send_seconds; the rest of whatsapp_message_seconds is ours (DB
+# context, waiting for slots, retry backoff)
+context_seconds = histogram("whatsapp_context_seconds", "Building the AI context (tenant and property lookups)")
+send_seconds = histogram("whatsapp_send_seconds", "Sending the reply through Evolution API")
+message_seconds = histogram("whatsapp_message_seconds", "Handling one incoming message end to end")
+
+conversation_store = ConversationStore(
+    settings.CONVERSATION_MAX_TURNS,
+    settings.CONVERSATION_MAX_CHATS,
+    settings.CONVERSATION_IDLE_TTL_SECONDS,
+)
+
+
+@dataclass
+class IncomingMessage:
+    message_id: str
+    remote_jid: str
+    phone_number: str
+    sender_name: str
+    content: str
+
+
+def extract_messages(payload: dict) -> List[IncomingMessage]:
+    """
+    Text messages from other users in an Evolution API 'messages.upsert'
+    event. Own messages, groups and media without caption are skipped.
+    """
+    if payload.get('event') != 'messages.upsert':
+        return []
+    data = payload.get('data') or {}
+    messages = data.get('messages', [])
+    if not messages:
+        messages = [data] if data.get('key') else []
+
+    incoming = []
+    for message in messages:
+        key = message.get('key', {})
+        if key.get('fromMe'):
+            continue
+
+        remote_jid = key.get('remoteJid')
+        if not remote_jid or '@s.whatsapp.net' not in remote_jid:
+            continue
+
+        msg_body = message.get('message') or {}
+        content = (
+            msg_body.get('conversation') or
+            msg_body.get('extendedTextMessage', {}).get('text') or
+            msg_body.get('imageMessage', {}).get('caption')
+        )
+        if content:
+            incoming.append(IncomingMessage(
+                message_id=key.get('id', ''),
+                remote_jid=remote_jid,
+                phone_number=remote_jid.split('@')[0],
+                sender_name=message.get('pushName', 'Usuario'),
+                content=content,
+            ))
+    return incoming
+
+
+async def handle_message(session_factory: Callable[[], AsyncSession], message: IncomingMessage):
+    started = time.perf_counter()
+    # The session is closed before the AI call, so a slow OpenAI doesn't
+    # keep pool connections checked out
+    async with session_factory() as session:
+        # 1. Who is writing: a tenant gets their balance in the context
+        tenant = await tenant_context_cache.lookup(session, message.remote_jid)
+
+        # 2. Available properties most relevant to the question, as AI context
+        prop_context = await property_index.context_for(session, message.content)
+    context_seconds.observe(time.perf_counter() - started)
+
+    # 3. Process with OpenAI, with the recent turns of this chat. A first
+    # question from someone who is not a tenant carries no per-user data, so
+    # its answer is shared through the AI cache with everyone asking it.
+    from app.services.openai_service import FALLBACK_REPLIES, openai_service
+    history = conversation_store.history(message.remote_jid, settings.CONVERSATION_TOKEN_BUDGET)
+    user_context = ""
+    if tenant or history:
+        user_context = f"Usuario: {message.sender_name}"
+        if tenant:
+            user_context += f"\n{tenant.render()}"
+    ai_response = await openai_service.generate_response(
+        message.content,
+        context=prop_context,
+        history=history,
+        user_context=user_context,
+    )
+    if ai_response and ai_response not in FALLBACK_REPLIES:
+        conversation_store.add(message.remote_jid, "user", message.content)
+        conversation_store.add(message.remote_jid, "assistant", ai_response)
+
+    # 4. Send response back
+    if ai_response:
+        sending = time.perf_counter()
+        await whatsapp_service.send_text_message(message.phone_number, ai_response)
+        send_seconds.observe(time.perf_counter() - sending)
+    message_seconds.observe(time.perf_counter() - started)
@@ -0,0 +1,119 @@
+"""
+Benchmark: charge notification dispatcher against a local Evolution API stub.
+
+Seeds N tenants with overdue_months overdue charges (default 1) and one
+upcoming charge each, runs the
+overdue and reminder dispatch twice (the second run must send nothing) and
+deletes what it created. Runs against the Postgres configured in Settings
+(use a scratch database: existing due charges are notified too, to the stub).
+
+Usage (from backend/):
+    python benchmarks/bench_charge_notifications.py [tenants] [stub_delay_ms] [fail_ratio] [rate_per_second] [overdue_months]
+
+With 14 or more overdue months a full batch of tenants claims more charges
+than fit in one statement's bind parameters, which the claim must handle.
+"""
+import sys
+import os
+import asyncio
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.session import engine
+from bench_whatsapp_send import STUB_HOST, start_stub
+
+SEED_SQL = [
+    """
+    INSERT INTO tenant (created_at, updated_at, full_name, phone, unique_link_token, agency_id)
+    SELECT now(), now(), 'Aviso ' || g, '+54 9 11 ' || lpad(g::text, 8, '0'), md5(random()::text || g), :agency_id
+    FROM generate_series(1, :count) g
+    """,
+    """
+    INSERT INTO contract (created_at, updated_at, start_date, end_date, initial_amount, current_amount, billing_day, status, tenant_id, property_id)
+    SELECT now(), now(), :overdue, :upcoming, 1000, 1000, 1, 'active', t.id, :property_id
+    FROM tenant t WHERE t.agency_id = :agency_id
+    """,
+    """
+    INSERT INTO monthlycharge (created_at, updated_at, month, year, due_date, rent_amount, expenses_amount, water_amount,
+                               other_amount, surcharge_amount, discount_amount, total_amount, balance_due, status, is_generated, contract_id)
+    SELECT now(), now(), EXTRACT(MONTH FROM d)::int, EXTRACT(YEAR FROM d)::int, d, 1000, 0, 0, 0, 0, 0, 1000, 1000, 'pending', true, c.id
+    FROM contract c JOIN tenant t ON t.id = c.tenant_id
+    CROSS JOIN (
+        SELECT CAST(CAST(:overdue AS date) - make_interval(months => m) AS date) FROM generate_series(0, :overdue_months - 1) m
+        UNION ALL SELECT CAST(:upcoming AS date)
+    ) AS due(d)
+    WHERE t.agency_id = :agency_id
+    """,
+]
+
+CLEANUP_SQL = [
+    "DELETE FROM chargenotification WHERE id > :max_notification_id",
+    "DELETE FROM monthlycharge WHERE contract_id IN (SELECT c.id FROM contract c JOIN tenant t ON t.id = c.tenant_id WHERE t.agency_id = :agency_id)",
+    "DELETE FROM contract WHERE tenant_id IN (SELECT id FROM tenant WHERE agency_id = :agency_id)",
+    "DELETE FROM tenantbalance WHERE tenant_id IN (SELECT id FROM tenant WHERE agency_id = :agency_id)",
+    "DELETE FROM tenant WHERE agency_id = :agency_id",
+    "DELETE FROM property WHERE agency_id = :agency_id",
+    "DELETE FROM agency WHERE id = :agency_id",
+]
+
+
+async def bench(tenant_count: int, delay: float, fail_ratio: float, rate: float, overdue_months: int):
+    server, port, stats = await start_stub(delay, fail_ratio)
+    settings.EVOLUTION_API_URL = f"http://{STUB_HOST}:{port}"
+    settings.EVOLUTION_SEND_RATE_PER_SECOND = rate
+    settings.EVOLUTION_SEND_BURST = max(1, int(rate))
+    settings.EVOLUTION_MAX_RETRIES = 0
+    from app.services.notifications import NOTIFICATION_KINDS, NotificationService
+    from app.services.whatsapp import whatsapp_service
+
+    today = date.today()
+    async with engine.begin() as conn:
+        agency_id = (await conn.execute(text("INSERT INTO agency (created_at, updated_at, name) VALUES (now(), now(), 'Bench Avisos') RETURNING id"))).scalar()
+        property_id = (await conn.execute(text(
+            "INSERT INTO property (created_at, updated_at, address, city, type, status, price, agency_id) "
+            "VALUES (now(), now(), 'Bench 1', 'Bench', 'apartment', 'rented', 0, :agency_id) RETURNING id"
+        ), {"agency_id": agency_id})).scalar()
+        max_notification_id = (await conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM chargenotification"))).scalar()
+        params = {
+            "agency_id": agency_id, "property_id": property_id, "count": tenant_count,
+            "overdue": today - timedelta(days=10), "upcoming": today + timedelta(days=2),
+            "overdue_months": overdue_months,
+        }
+        print(f"Seeding {tenant_count} tenants with {overdue_months + 1} charges each...")
+        for sql in SEED_SQL:
+            await conn.execute(text(sql), params)
+        await conn.execute(text("ANALYZE"))
+
+    try:
+        print(f"stub_delay={delay * 1000:.0f}ms fail_ratio={fail_ratio} rate={rate or 'unlimited'}")
+        print(f"{'run':>4} {'kind':>9} {'tenants':>8} {'charges':>8} {'failed':>7} {'seconds':>8} {'msgs/s':>8}")
+        for run in (1, 2):
+            for kind in NOTIFICATION_KINDS:
+                result = await NotificationService.dispatch(kind)
+                per_second = result.tenants_notified / result.elapsed_seconds if result.elapsed_seconds else 0
+                print(f"{run:>4} {kind:>9} {result.tenants_notified:>8} {result.charges_notified:>8} "
+                      f"{result.failed:>7} {result.elapsed_seconds:>8.2f} {per_second:>8.1f}")
+        print(f"stub received {stats['requests']} requests over {stats['connections']} connections")
+    finally:
+        await whatsapp_service.close()
+        async with engine.begin() as conn:
+            for sql in CLEANUP_SQL:
+                await conn.execute(text(sql), {"agency_id": agency_id, "max_notification_id": max_notification_id})
+        await engine.dispose()
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    tenant_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    fail_ratio = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0
+    overdue_months = int(sys.argv[5]) if len(sys.argv) > 5 else 1
+    asyncio.run(bench(tenant_count, delay, fail_ratio, rate, overdue_months))
@@ -0,0 +1,84 @@
+"""
+Benchmark: latency of ContractService.create_contract by contract length.
+
+Runs against the database configured in Settings (use a scratch database!).
+Everything runs inside one transaction that is rolled back at the end.
+
+Usage (from backend/):
+    python benchmarks/bench_contract_charges.py [repetitions]
+"""
+import sys
+import os
+import asyncio
+import secrets
+import statistics
+import time
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app.db.session import async_session, engine
+from app.models import Agency, Tenant, Property, Contract
+from app.services.contracts import ContractService
+
+CONTRACT_MONTHS = [1, 12, 36, 120]
+
+
+async def bench(repetitions: int):
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    async with async_session() as session:
+        agency = Agency(name="Bench Agency")
+        session.add(agency)
+        await session.flush()
+        tenant = Tenant(full_name="Bench Tenant", phone="0", unique_link_token=secrets.token_urlsafe(32), agency_id=agency.id)
+        prop = Property(address="Bench 123", city="Bench", type="apartment", status="rented", agency_id=agency.id)
+        session.add(tenant)
+        session.add(prop)
+        await session.flush()
+
+        print(f"{'months':>6} {'p50 ms':>8} {'mean ms':>8} {'max ms':>8} {'stmts':>6}")
+        for months in CONTRACT_MONTHS:
+            timings = []
+            for _ in range(repetitions):
+                start_date = date(2025, 1, 31)
+                contract = Contract(
+                    start_date=start_date,
+                    end_date=start_date + relativedelta(months=months - 1),
+                    initial_amount=100000,
+                    current_amount=100000,
+                    billing_day=31,
+                    tenant_id=tenant.id,
+                    property_id=prop.id,
+                )
+                savepoint = await session.begin_nested()
+                statements = 0
+                t0 = time.perf_counter()
+                await ContractService.create_contract(session, contract)
+                await session.flush()
+                timings.append((time.perf_counter() - t0) * 1000)
+                await savepoint.rollback()
+
+            print(
+                f"{months:>6} {statistics.median(timings):>8.2f} {statistics.mean(timings):>8.2f} "
+                f"{max(timings):>8.2f} {statements:>6}"
+            )
+
+        await session.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
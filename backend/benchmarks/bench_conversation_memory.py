@@ -0,0 +1,65 @@
+"""
+Benchmark: memory and trimming cost of ConversationStore.
+
+Fills the store with many active chats of typical WhatsApp-length turns and
+reports the traced Python memory, the store's own stats and how long it
+takes to trim a full chat to the token budget. No database or API needed.
+
+Usage (from backend/):
+    python benchmarks/bench_conversation_memory.py [chats] [turns_per_chat] [token_budget]
+"""
+import sys
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.conversations import ConversationStore, estimate_tokens
+
+USER_LINES = [
+    "Hola, ¿tienen departamentos en CABA?",
+    "¿Y cuánto sale el de Charcas?",
+    "¿Acepta mascotas?",
+    "¿Cuánto debo este mes?",
+    "Perfecto, gracias. ¿Puedo pagar por transferencia?",
+]
+
+
+def main(chats: int, turns: int, token_budget: int):
+    rng = random.Random(3)
+    store = ConversationStore(settings.CONVERSATION_MAX_TURNS, max(chats, settings.CONVERSATION_MAX_CHATS), 3600)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(turns // 2):
+        for chat in range(chats):
+            chat_id = f"54911{chat:08d}@s.whatsapp.net"
+            store.add(chat_id, "user", rng.choice(USER_LINES))
+            store.add(chat_id, "assistant", "Claro 😊 " + " ".join(rng.choice(USER_LINES) for _ in range(3)))
+    after = tracemalloc.take_snapshot()
+    traced = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    timings, prompt_tokens = [], []
+    for chat in range(min(chats, 1000)):
+        t0 = time.perf_counter()
+        history = store.history(f"54911{chat:08d}@s.whatsapp.net", token_budget)
+        timings.append((time.perf_counter() - t0) * 1000)
+        prompt_tokens.append(sum(estimate_tokens(turn["content"]) for turn in history))
+
+    stats = store.stats()
+    print(f"chats={chats} turns/chat={turns} (ring buffer keeps {store.max_turns}) token_budget={token_budget}")
+    print(f"store stats: {stats}")
+    print(f"traced memory: {traced / 1024 / 1024:.1f} MiB ({traced / max(stats['active_chats'], 1) / 1024:.1f} KiB per chat)")
+    print(f"history(): p50 {statistics.median(timings) * 1000:.1f} µs, max prompt history {max(prompt_tokens)} tokens")
+
+
+if __name__ == "__main__":
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    token_budget = int(sys.argv[3]) if len(sys.argv) > 3 else settings.CONVERSATION_TOKEN_BUDGET
+    main(chats, turns, token_budget)
@@ -0,0 +1,92 @@
+"""
+Benchmark: OpenAIService response cache with a fake OpenAI client.
+
+Replays a stream of questions where most are rephrasings of a few common
+ones (case, accents, punctuation) against a client that sleeps to mimic a
+completion, then changes the context (a catalog update) and replays again.
+Messages come from many users, like the webhook builds them: some are
+tenants (balance in the context) and some are follow-ups in an ongoing chat
+(history), and those are never served from the cache.
+No API key or network needed.
+
+Usage (from backend/):
+    python benchmarks/bench_openai_cache.py [questions] [api_latency_ms] [users] [tenant_share] [follow_up_share]
+"""
+import sys
+import os
+import asyncio
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.openai_service import OpenAIService
+
+COMMON_QUESTIONS = [
+    "¿Qué departamentos tienen disponibles?",
+    "que departamentos tienen disponibles",
+    "¿Cuánto debo?",
+    "cuanto debo??",
+    "Hola, ¿aceptan mascotas?",
+    "HOLA aceptan mascotas",
+]
+
+
+class FakeCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        answer = f"Respuesta a: {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+
+async def replay(service: OpenAIService, messages, context: str):
+    timings = []
+    for user, is_tenant, is_follow_up, question in messages:
+        # Same split as whatsapp_bot.handle_message
+        history = [{"role": "user", "content": "Hola"}, {"role": "assistant", "content": "¡Hola!"}] if is_follow_up else []
+        user_context = ""
+        if is_tenant or history:
+            user_context = f"Usuario: {user}"
+            if is_tenant:
+                user_context += f"\nInquilino registrado: {user}. Saldo pendiente: $1000"
+        t0 = time.perf_counter()
+        await service.generate_response(question, context=context, history=history, user_context=user_context)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+async def bench(count: int, latency: float, users: int, tenant_share: float, follow_up_share: float):
+    completions = FakeCompletions(latency)
+    service = OpenAIService(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    rng = random.Random(42)
+    tenants = {f"Usuario {u}" for u in range(users) if rng.random() < tenant_share}
+    messages = []
+    for i in range(count):
+        user = f"Usuario {rng.randrange(users)}"
+        question = rng.choice(COMMON_QUESTIONS) if rng.random() < 0.8 else f"Pregunta única {i}"
+        messages.append((user, user in tenants, rng.random() < follow_up_share, question))
+
+    print(f"users={users} tenant_share={tenant_share} follow_up_share={follow_up_share}")
+    print(f"{'phase':>16} {'api calls':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for phase, context in (("catalog v1", "Propiedades disponibles:\n- A"), ("catalog v2", "Propiedades disponibles:\n- A\n- B")):
+        before = completions.calls
+        timings = sorted(await replay(service, messages, context))
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{phase:>16} {completions.calls - before:>10} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+    print(service.cache.stats())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    users = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    tenant_share = float(sys.argv[4]) if len(sys.argv) > 4 else 0.3
+    follow_up_share = float(sys.argv[5]) if len(sys.argv) > 5 else 0.4
+    asyncio.run(bench(count, latency, users, tenant_share, follow_up_share))
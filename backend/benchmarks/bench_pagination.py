@@ -0,0 +1,76 @@
+"""
+Benchmark: offset vs keyset (cursor) pagination on the tenants listing.
+
+Seeds enough tenants for the requested page depth inside one transaction,
+times page 1 and the deep page with both strategies, then rolls back.
+Runs against the database configured in Settings (use a scratch database!).
+
+Usage (from backend/):
+    python benchmarks/bench_pagination.py [deep_page] [page_size] [repetitions]
+"""
+import sys
+import os
+import asyncio
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.api.pagination import encode_cursor, paginate
+from app.db.session import async_session, engine
+from app.models import Tenant
+
+SEED_TENANTS_SQL = text("""
+    INSERT INTO tenant (created_at, updated_at, full_name, phone, unique_link_token)
+    SELECT now(), now(), 'Bench ' || g, '549' || g, md5(random()::text || g)
+    FROM generate_series(1, :count) g
+""")
+
+
+async def time_page(session: AsyncSession, repetitions: int, **kwargs) -> float:
+    timings = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        rows = await paginate(session, select(Tenant), Tenant, Response(), **kwargs)
+        timings.append((time.perf_counter() - t0) * 1000)
+        session.expunge_all()
+    assert rows, "page came back empty"
+    return statistics.median(timings)
+
+
+async def bench(deep_page: int, page_size: int, repetitions: int):
+
+    async with async_session() as session:
+        print(f"Seeding {deep_page * page_size} tenants...")
+        await session.execute(SEED_TENANTS_SQL, {"count": deep_page * page_size})
+        await session.execute(text("ANALYZE tenant"))
+
+        deep_skip = (deep_page - 1) * page_size
+        # The cursor a client would hold after walking to the previous page
+        result = await session.execute(select(Tenant.id).order_by(Tenant.id).offset(deep_skip - 1).limit(1))
+        cursor = encode_cursor("id", None, result.scalar_one())
+
+        print(f"{'page':>8} {'offset ms':>10} {'cursor ms':>10}")
+        offset_first = await time_page(session, repetitions, skip=0, limit=page_size)
+        cursor_first = await time_page(session, repetitions, limit=page_size)
+        print(f"{1:>8} {offset_first:>10.2f} {cursor_first:>10.2f}")
+        offset_deep = await time_page(session, repetitions, skip=deep_skip, limit=page_size)
+        cursor_deep = await time_page(session, repetitions, cursor=cursor, limit=page_size)
+        print(f"{deep_page:>8} {offset_deep:>10.2f} {cursor_deep:>10.2f}")
+
+        await session.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    deep_page = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    repetitions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(bench(deep_page, page_size, repetitions))
@@ -0,0 +1,122 @@
+"""
+Benchmark: PaymentService.post_payment_batch throughput.
+
+Creates `tenants` tenants with a two-year contract each, posts `payments`
+payments spread over them as one batch (chunks of PAYMENT_BATCH_SIZE), then
+checks every charge satisfies total - allocated == balance_due. Runs against
+the Postgres configured in Settings (use a scratch database!); the data it
+creates is deleted at the end.
+
+Usage (from backend/):
+    python benchmarks/bench_payment_batch.py [payments] [tenants]
+"""
+import sys
+import os
+import asyncio
+import secrets
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.models import Agency, Tenant, Property, Contract
+from app.services.contracts import ContractService
+from app.services.payments import PaymentService
+
+MONTHLY_RENT = 1000.1
+
+MISMATCHES_SQL = text("""
+    SELECT COUNT(*) FROM (
+        SELECT mc.id
+        FROM monthlycharge mc
+        JOIN contract c ON c.id = mc.contract_id
+        LEFT JOIN paymentallocation pa ON pa.charge_id = mc.id
+        WHERE c.tenant_id = ANY(:tenant_ids)
+        GROUP BY mc.id
+        HAVING mc.balance_due < 0
+            OR ABS(mc.total_amount - COALESCE(SUM(pa.amount_allocated), 0) - mc.balance_due) > 0.001
+    ) bad
+""")
+
+
+async def bench(payment_count: int, tenant_count: int):
+    async with async_session() as session:
+        agency = Agency(name="Batch Bench Agency")
+        session.add(agency)
+        await session.flush()
+        prop = Property(address="Batch 1", city="Bench", type="apartment", status="rented", agency_id=agency.id)
+        session.add(prop)
+        tenants = [
+            Tenant(full_name=f"Batch {i}", phone=f"batch{i}", unique_link_token=secrets.token_urlsafe(32), agency_id=agency.id)
+            for i in range(tenant_count)
+        ]
+        session.add_all(tenants)
+        await session.flush()
+        for tenant in tenants:
+            await ContractService.create_contract(session, Contract(
+                start_date=date(2025, 1, 1),
+                end_date=date(2026, 12, 1),
+                initial_amount=MONTHLY_RENT,
+                current_amount=MONTHLY_RENT,
+                tenant_id=tenant.id,
+                property_id=prop.id,
+            ))
+        await session.commit()
+        tenant_ids = [t.id for t in tenants]
+        agency_id, property_id = agency.id, prop.id
+
+    async def rows():
+        for i in range(payment_count):
+            # Odd cents so allocations split charges unevenly
+            yield i + 1, {
+                "tenant_id": tenant_ids[i % tenant_count],
+                "amount": 333.37,
+                "payment_date": "2025-06-01T00:00:00",
+                "method": "transfer",
+            }
+
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    async with async_session() as session:
+        result = await PaymentService.post_payment_batch(session, rows(), settings.PAYMENT_BATCH_SIZE)
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    async with async_session() as session:
+        params = {"tenant_ids": tenant_ids}
+        mismatches = (await session.execute(MISMATCHES_SQL, params)).scalar_one()
+
+        # Clean up everything the run created
+        await session.execute(text("DELETE FROM paymentallocation WHERE payment_id IN (SELECT id FROM payment WHERE tenant_id = ANY(:tenant_ids))"), params)
+        await session.execute(text("DELETE FROM payment WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM monthlycharge WHERE contract_id IN (SELECT id FROM contract WHERE tenant_id = ANY(:tenant_ids))"), params)
+        await session.execute(text("DELETE FROM contract WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM tenantbalance WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM tenant WHERE id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM property WHERE id = :id"), {"id": property_id})
+        await session.execute(text("DELETE FROM agency WHERE id = :id"), {"id": agency_id})
+        await session.commit()
+
+    await engine.dispose()
+
+    print(f"payments={payment_count} tenants={tenant_count} batch_size={settings.PAYMENT_BATCH_SIZE}")
+    print(f"posted={result.posted} failed={result.failed} elapsed={result.elapsed_seconds}s "
+          f"throughput={result.payments_per_second} payments/s statements={statements}")
+    print(f"charges with total - allocated != balance_due: {mismatches}")
+    return result.failed == 0 and mismatches == 0
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    payment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tenant_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ok = asyncio.run(bench(payment_count, tenant_count))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,79 @@
+"""
+Benchmark: prompt size and lookup time of the property retrieval index.
+
+Builds PropertyIndex over synthetic catalogs of growing size (in memory, no
+database) and compares the context the AI receives with the old full dump
+of every available property.
+
+Usage (from backend/):
+    python benchmarks/bench_property_retrieval.py [top_k]
+"""
+import sys
+import os
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.property_context import PropertyIndex, render_line
+
+CITIES = ["CABA", "Rosario", "Córdoba", "La Plata", "Mendoza", "San Isidro", "Mar del Plata", "Tigre"]
+STREETS = ["Charcas", "Corrientes", "Santa Fe", "Rivadavia", "San Martín", "Belgrano", "Mitre", "Sarmiento", "Callao"]
+TYPES = ["apartment", "apartment", "house", "local"]
+QUESTIONS = [
+    "¿Qué departamentos tienen disponibles?",
+    "Busco casa en Rosario hasta 300 mil",
+    "deptos en CABA entre 200.000 y 400.000",
+    "¿Tienen algo sobre Corrientes?",
+    "local comercial en Córdoba",
+    "Hola, quiero alquilar",
+]
+
+
+def catalog(size: int, rng: random.Random):
+    return [
+        SimpleNamespace(
+            id=i,
+            address=f"{rng.choice(STREETS)} {rng.randint(100, 9000)}",
+            city=rng.choice(CITIES),
+            type=rng.choice(TYPES),
+            status="available",
+            price=float(rng.randrange(80_000, 1_500_000, 10_000)),
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+def main(top_k: int):
+    rng = random.Random(7)
+    print(f"{'catalog':>8} {'full dump chars':>16} {'top-k chars p95':>16} {'search ms p50':>14} {'add ms':>8}")
+    for size in (100, 1_000, 10_000, 50_000):
+        properties = catalog(size, rng)
+        index = PropertyIndex(ttl_seconds=3600, top_k=top_k)
+        index.rebuild(properties)
+        full_dump = "Propiedades disponibles:\n" + "".join(render_line(p) for p in properties)
+
+        sizes, timings = [], []
+        for _ in range(20):
+            for question in QUESTIONS:
+                t0 = time.perf_counter()
+                context = index.render(question)
+                timings.append((time.perf_counter() - t0) * 1000)
+                sizes.append(len(context))
+        sizes.sort()
+
+        # Incremental maintenance: one new listing, as after a commit
+        new = catalog(1, rng)[0]
+        new.id = size + 1
+        t0 = time.perf_counter()
+        index._add(new)
+        add_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"{size:>8} {len(full_dump):>16} {sizes[int(len(sizes) * 0.95)]:>16} "
+              f"{statistics.median(timings):>14.2f} {add_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
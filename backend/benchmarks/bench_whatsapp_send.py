@@ -0,0 +1,113 @@
+"""
+Benchmark: WhatsApp sends per second against a local stub of Evolution API.
+
+Compares the old behaviour (a new httpx.AsyncClient, so a new connection, per
+message) with WhatsAppService's pooled client and send_many. The stub answers
+every POST with a small JSON body after an optional delay, and can fail a
+fraction of requests with 503 to exercise the retries. The rate limiter is
+disabled unless a rate is given, so the numbers show the client overhead.
+
+Usage (from backend/):
+    python benchmarks/bench_whatsapp_send.py [messages] [concurrency] [stub_delay_ms] [fail_ratio] [rate_per_second]
+"""
+import sys
+import os
+import asyncio
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from app.core.config import settings
+
+STUB_HOST = "127.0.0.1"
+RESPONSE_BODY = b'{"key":{"id":"stub"},"status":"PENDING"}'
+
+
+async def start_stub(delay: float, fail_ratio: float):
+    stats = {"requests": 0, "connections": 0}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats["connections"] += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                stats["requests"] += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                status = b"503 Service Unavailable" if random.random() < fail_ratio else b"200 OK"
+                writer.write(
+                    b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, STUB_HOST, 0)
+    return server, server.sockets[0].getsockname()[1], stats
+
+
+async def send_unpooled(url: str, headers: dict, phone: str, text: str):
+    # What send_text_message did before: one client (and connection) per message
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json={"number": phone, "text": text}, headers=headers, timeout=10.0)
+        response.raise_for_status()
+        return response.json()
+
+
+async def bench(messages: int, concurrency: int, delay: float, fail_ratio: float, rate: float):
+    server, port, stats = await start_stub(delay, fail_ratio)
+    settings.EVOLUTION_API_URL = f"http://{STUB_HOST}:{port}"
+    settings.EVOLUTION_SEND_RATE_PER_SECOND = rate
+    settings.EVOLUTION_SEND_BURST = max(1, int(rate))
+    settings.EVOLUTION_RETRY_MAX_DELAY_SECONDS = 0.05
+    from app.services.whatsapp import WhatsAppService
+    service = WhatsAppService()
+    batch = [(f"54911{i:06d}", f"Mensaje {i}") for i in range(messages)]
+
+    url = f"{service.base_url}/sendText/{service.instance}"
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def unpooled(phone, text):
+        async with semaphore:
+            try:
+                return await send_unpooled(url, service.headers, phone, text)
+            except Exception:
+                return None
+
+    print(f"messages={messages} concurrency={concurrency} stub_delay={delay * 1000:.0f}ms fail_ratio={fail_ratio} rate={rate or 'unlimited'}")
+    print(f"{'client':>10} {'sends/s':>10} {'ok':>6} {'requests':>9} {'connections':>12}")
+    for name, run in (
+        ("per-send", lambda: asyncio.gather(*(unpooled(p, t) for p, t in batch))),
+        ("pooled", lambda: service.send_many(batch, concurrency=concurrency)),
+    ):
+        stats.update(requests=0, connections=0)
+        t0 = time.perf_counter()
+        results = await run()
+        elapsed = time.perf_counter() - t0
+        ok = sum(1 for r in results if r is not None)
+        print(f"{name:>10} {messages / elapsed:>10.1f} {ok:>6} {stats['requests']:>9} {stats['connections']:>12}")
+
+    await service.close()
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    delay = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+    fail_ratio = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    rate = float(sys.argv[5]) if len(sys.argv) > 5 else 0
+    asyncio.run(bench(messages, concurrency, delay, fail_ratio, rate))
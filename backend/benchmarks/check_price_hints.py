@@ -0,0 +1,49 @@
+"""
+Checks the price limits PropertyIndex reads from chat messages.
+
+Covers thousands separators, decimals before a unit ("1,5 millones") and
+areas that must not be taken for prices ("50 m2"). In memory, no database.
+
+Usage (from backend/):
+    python benchmarks/check_price_hints.py
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.property_context import PropertyIndex
+
+# message -> (min_price, max_price)
+CASES = {
+    "casa hasta $400.000": (None, 400_000),
+    "depto hasta 320,000": (None, 320_000),
+    "hasta 300 mil": (None, 300_000),
+    "hasta 1,5 millones": (None, 1_500_000),
+    "hasta 1.5 M": (None, 1_500_000),
+    "hasta 2 millones": (None, 2_000_000),
+    "hasta 1.500.000": (None, 1_500_000),
+    "entre 200.000 y 400.000": (200_000, 400_000),
+    "entre 1,2 y 1,8 millones": (1_200_000, 1_800_000),
+    "entre 200 y 400 mil": (200_000, 400_000),
+    "más de 50 m2": (None, None),
+    "más de 80 metros cuadrados hasta 500 mil": (None, 500_000),
+    "desde 250k": (250_000, None),
+}
+
+
+def main() -> bool:
+    index = PropertyIndex(ttl_seconds=60, top_k=5)
+    failures = 0
+    for message, expected in CASES.items():
+        hints = index.parse_hints(message)
+        got = (hints.min_price, hints.max_price)
+        ok = got == expected
+        failures += not ok
+        print(f"{'ok ' if ok else 'FAIL'} {message!r}: min={got[0]} max={got[1]}" + ("" if ok else f" (expected {expected})"))
+    print(f"{len(CASES) - failures}/{len(CASES)} passed")
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,105 @@
+"""
+Checks read-replica routing against a real primary/standby pair.
+
+Needs DATABASE_URI (primary) and DATABASE_REPLICA_URI (a streaming standby
+of it, e.g. made with `pg_basebackup -R`). The script:
+  1. calls the read-only listings and a write through the API and counts the
+     statements each engine ran (reads -> replica, writes -> primary);
+  2. pauses WAL replay on the standby, writes on the primary and checks
+     that reads fall back to the primary once the lag passes the limit;
+  3. resumes replay and checks that reads return to the replica.
+
+Usage (from backend/):
+    REPLICA_LAG_CHECK_SECONDS=0.2 REPLICA_MAX_LAG_SECONDS=1 python benchmarks/check_replica_routing.py
+"""
+import sys
+import os
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from app.core.config import settings
+from app.db.session import engine, replica_engine, replica_router
+from app.main import app
+
+READ_PATHS = ["/tenants/", "/contracts/", "/payments/", "/properties/"]
+
+
+def count_statements() -> Counter:
+    counts = Counter()
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: counts.update(["primary"]))
+    event.listen(replica_engine.sync_engine, "before_cursor_execute", lambda *args: counts.update(["replica"]))
+    return counts
+
+
+def run_reads(client: TestClient, counts: Counter) -> Counter:
+    counts.clear()
+    for path in READ_PATHS:
+        response = client.get(f"{settings.API_V1_STR}{path}?limit=5")
+        assert response.status_code == 200, (path, response.status_code)
+    return Counter(counts)
+
+
+def main() -> bool:
+    if replica_engine is None:
+        sys.exit("Set DATABASE_REPLICA_URI to a standby of DATABASE_URI.")
+    counts = count_statements()
+    ok = True
+
+    with TestClient(app) as client:
+        portal = client.portal
+
+        def sql(target, statement):
+            async def run():
+                async with target.connect() as conn:
+                    result = await conn.execute(text(statement))
+                    value = result.scalar() if result.returns_rows else None
+                    await conn.commit()
+                    return value
+            return portal.call(run)
+
+        def wait_for_check():
+            time.sleep(settings.REPLICA_LAG_CHECK_SECONDS + 0.1)
+
+        # 1. Routing
+        wait_for_check()
+        reads = run_reads(client, counts)
+        print(f"reads on a healthy replica: {dict(reads)}")
+        ok &= reads["replica"] > 0 and reads["primary"] == 0
+
+        counts.clear()
+        response = client.post(f"{settings.API_V1_STR}/properties/", json={
+            "address": "Replica 1", "city": "Replica", "type": "house", "status": "rented", "agency_id": 1,
+        })
+        print(f"write: HTTP {response.status_code} {dict(counts)}")
+        ok &= response.status_code == 200 and counts["replica"] == 0
+
+        # 2. Lag guard
+        sql(replica_engine, "SELECT pg_wal_replay_pause()")
+        try:
+            sql(engine, "UPDATE property SET status = 'rented' WHERE address = 'Replica 1'")
+            time.sleep(settings.REPLICA_MAX_LAG_SECONDS + 0.5)
+            wait_for_check()
+            reads = run_reads(client, counts)
+            print(f"reads while replay is paused (lag {replica_router.lag_seconds}s): {dict(reads)}")
+            ok &= reads["primary"] > 0 and not replica_router.healthy
+        finally:
+            sql(replica_engine, "SELECT pg_wal_replay_resume()")
+            sql(engine, "DELETE FROM property WHERE address = 'Replica 1'")
+
+        # 3. Recovery
+        time.sleep(0.5)
+        wait_for_check()
+        reads = run_reads(client, counts)
+        print(f"reads after replay resumed (lag {replica_router.lag_seconds}s): {dict(reads)}")
+        ok &= reads["replica"] > 0 and replica_router.healthy
+
+    print("✅ replica routing OK" if ok else "❌ replica routing FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,122 @@
+"""
+Captures EXPLAIN (ANALYZE, BUFFERS) plans for the queries behind each endpoint.
+
+Run it before and after an index migration and diff the two files:
+    python benchmarks/explain_hot_queries.py before     # on the old schema
+    alembic upgrade head
+    python benchmarks/explain_hot_queries.py after
+    diff explain_before.txt explain_after.txt
+
+Parameters (tenant, contract, payment) are picked from the existing data, so
+point it at a database with realistic volume. Statements that write (the FIFO
+allocation) run inside a transaction that is rolled back.
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+from app.db.session import engine
+from app.models import Contract, MonthlyCharge, Payment, PaymentAllocation, Property, Tenant
+from app.services.payments import ALLOCATE_FIFO_SQL
+
+PAGE_SIZE = 100
+
+
+def literal_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def pick_parameters(conn) -> dict:
+    # The tenant with the most pending charges is the worst case for allocation
+    tenant_id = (await conn.execute(
+        select(Contract.tenant_id)
+        .join(MonthlyCharge, MonthlyCharge.contract_id == Contract.id)
+        .where(MonthlyCharge.balance_due > 0)
+        .group_by(Contract.tenant_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    )).scalar()
+    contract_id = (await conn.execute(select(Contract.id).where(Contract.tenant_id == tenant_id).limit(1))).scalar()
+    payment_id = (await conn.execute(select(func.max(Payment.id)))).scalar()
+    if tenant_id is None or payment_id is None:
+        raise SystemExit("Need at least one contract with pending charges and one payment to explain against.")
+    contract_ids = (await conn.execute(select(Contract.id).order_by(Contract.id).limit(PAGE_SIZE))).scalars().all()
+    payment_ids = (await conn.execute(select(Payment.id).order_by(Payment.id).limit(PAGE_SIZE))).scalars().all()
+    return {
+        "tenant_id": tenant_id,
+        "contract_id": contract_id,
+        "payment_id": payment_id,
+        "contract_ids": contract_ids,
+        "payment_ids": payment_ids,
+    }
+
+
+def endpoint_queries(p: dict):
+    """
+    (name, sql, params) for the statements the endpoints and services issue.
+    """
+    return [
+        ("GET /contracts/", literal_sql(select(Contract).order_by(Contract.id).limit(PAGE_SIZE)), {}),
+        ("GET /contracts/?expand=monthly_charges (selectin)", literal_sql(
+            select(MonthlyCharge).where(MonthlyCharge.contract_id.in_(p["contract_ids"]))
+        ), {}),
+        ("GET /contracts/{id}", literal_sql(select(Contract).where(Contract.id == p["contract_id"])), {}),
+        ("GET /payments/", literal_sql(select(Payment).order_by(Payment.id).limit(PAGE_SIZE)), {}),
+        ("GET /payments/?sort=payment_date", literal_sql(
+            select(Payment).order_by(Payment.payment_date, Payment.id).limit(PAGE_SIZE)
+        ), {}),
+        ("GET /payments/?expand=allocations (selectin)", literal_sql(
+            select(PaymentAllocation).where(PaymentAllocation.payment_id.in_(p["payment_ids"]))
+        ), {}),
+        ("GET /tenants/?sort=full_name", literal_sql(
+            select(Tenant).order_by(Tenant.full_name, Tenant.id).limit(PAGE_SIZE)
+        ), {}),
+        ("POST /payments/ pending charges (ORM path)", literal_sql(
+            select(MonthlyCharge)
+            .join(Contract)
+            .where(Contract.tenant_id == p["tenant_id"])
+            .where(MonthlyCharge.balance_due > 0)
+            .order_by(MonthlyCharge.due_date, MonthlyCharge.id)
+        ), {}),
+        ("POST /payments/ FIFO allocation (rolled back)", ALLOCATE_FIFO_SQL.text, {
+            "tenant_id": p["tenant_id"],
+            "amount": Decimal(1000000),
+            "payment_id": p["payment_id"],
+            "created_at": datetime.utcnow(),
+        }),
+        ("POST /whatsapp/webhook available properties", literal_sql(
+            select(Property).where(Property.status == "available")
+        ), {}),
+    ]
+
+
+async def main(label: str):
+    out_path = f"explain_{label}.txt"
+    async with engine.connect() as conn:
+        params = await pick_parameters(conn)
+        await conn.rollback()
+
+        with open(out_path, "w") as out:
+            out.write(f"# EXPLAIN (ANALYZE, BUFFERS) - {label}\n# parameters: {params}\n")
+            for name, sql, bind in endpoint_queries(params):
+                result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), bind)
+                plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+                out.write(f"\n## {name}\n{plan}\n")
+                print(f"{name}: {plan.splitlines()[-1].strip()}")
+
+    await engine.dispose()
+    print(f"Plans written to {out_path}")
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "current"))
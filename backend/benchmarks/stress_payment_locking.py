@@ -0,0 +1,119 @@
+"""
+Concurrency stress test for PaymentService per-tenant locking.
+
+Fires many concurrent payments at a handful of tenants, each in its own
+session/transaction like the API does, then checks that no charge was
+over-allocated. Runs against the Postgres configured in Settings (use a
+scratch database!); the data it creates is deleted at the end.
+
+Usage (from backend/):
+    python benchmarks/stress_payment_locking.py [advisory|row|none] [tenants] [payments_per_tenant]
+
+"none" is expected to report violations: it shows the race the locks prevent.
+"""
+import sys
+import os
+import asyncio
+import secrets
+import time
+from datetime import date, datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.session import async_session, engine
+from app.models import Agency, Tenant, Property, Contract, Payment
+from app.services.contracts import ContractService
+from app.services.payments import PaymentService
+
+MONTHLY_RENT = 1000.0
+
+VIOLATIONS_SQL = text("""
+    SELECT mc.id, mc.total_amount, mc.balance_due, COALESCE(SUM(pa.amount_allocated), 0) AS allocated
+    FROM monthlycharge mc
+    JOIN contract c ON c.id = mc.contract_id
+    LEFT JOIN paymentallocation pa ON pa.charge_id = mc.id
+    WHERE c.tenant_id = ANY(:tenant_ids)
+    GROUP BY mc.id
+    HAVING mc.balance_due < 0
+        OR COALESCE(SUM(pa.amount_allocated), 0) > mc.total_amount + 0.001
+        OR ABS(mc.total_amount - COALESCE(SUM(pa.amount_allocated), 0) - mc.balance_due) > 0.001
+""")
+
+
+async def stress(mode: str, tenant_count: int, payments_per_tenant: int):
+    settings.PAYMENT_LOCK_MODE = mode
+
+    async with async_session() as session:
+        agency = Agency(name="Stress Agency")
+        session.add(agency)
+        await session.flush()
+        prop = Property(address="Stress 1", city="Stress", type="apartment", status="rented", agency_id=agency.id)
+        session.add(prop)
+        tenants = [
+            Tenant(full_name=f"Stress {i}", phone=str(i), unique_link_token=secrets.token_urlsafe(32), agency_id=agency.id)
+            for i in range(tenant_count)
+        ]
+        session.add_all(tenants)
+        await session.flush()
+        for tenant in tenants:
+            await ContractService.create_contract(session, Contract(
+                start_date=date(2025, 1, 1),
+                end_date=date(2026, 12, 1),
+                initial_amount=MONTHLY_RENT,
+                current_amount=MONTHLY_RENT,
+                tenant_id=tenant.id,
+                property_id=prop.id,
+            ))
+        await session.commit()
+        tenant_ids = [t.id for t in tenants]
+        agency_id, property_id = agency.id, prop.id
+
+    async def pay(tenant_id: int):
+        async with async_session() as session:
+            payment = Payment(amount=MONTHLY_RENT * 0.75, payment_date=datetime.utcnow(), method="transfer", tenant_id=tenant_id)
+            await PaymentService.process_payment(session, payment)
+            await session.commit()
+
+    jobs = [pay(tenant_id) for _ in range(payments_per_tenant) for tenant_id in tenant_ids]
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    elapsed = time.perf_counter() - t0
+    errors = [r for r in results if isinstance(r, Exception)]
+
+    async with async_session() as session:
+        violations = (await session.execute(VIOLATIONS_SQL, {"tenant_ids": tenant_ids})).all()
+
+        # Clean up everything the run created
+        params = {"tenant_ids": tenant_ids}
+        await session.execute(text("DELETE FROM paymentallocation WHERE payment_id IN (SELECT id FROM payment WHERE tenant_id = ANY(:tenant_ids))"), params)
+        await session.execute(text("DELETE FROM payment WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM monthlycharge WHERE contract_id IN (SELECT id FROM contract WHERE tenant_id = ANY(:tenant_ids))"), params)
+        await session.execute(text("DELETE FROM contract WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM tenantbalance WHERE tenant_id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM tenant WHERE id = ANY(:tenant_ids)"), params)
+        await session.execute(text("DELETE FROM property WHERE id = :id"), {"id": property_id})
+        await session.execute(text("DELETE FROM agency WHERE id = :id"), {"id": agency_id})
+        await session.commit()
+
+    await engine.dispose()
+
+    print(f"mode={mode} tenants={tenant_count} payments={len(jobs)}")
+    print(f"elapsed={elapsed:.2f}s throughput={len(jobs) / elapsed:.1f} payments/s errors={len(errors)}")
+    for error in errors[:5]:
+        print(f"  error: {error!r}")
+    print(f"over-allocated charges: {len(violations)}")
+    for row in violations[:10]:
+        print(f"  charge {row.id}: total={row.total_amount} allocated={row.allocated} balance_due={row.balance_due}")
+    return not violations and not errors
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    mode = sys.argv[1] if len(sys.argv) > 1 else "advisory"
+    tenant_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    payments_per_tenant = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    ok = asyncio.run(stress(mode, tenant_count, payments_per_tenant))
+    sys.exit(0 if ok else 1)
@@ -1,6 +1,4 @@
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 import os
 import sys
@@ -9,11 +7,9 @@ import sys
 sys.path.append(os.getcwd())
 
 async def check_and_seed():
-    from app.core.config import settings
+    from app.db.session import async_session
     from app.models.base_entities import Agency
-    engine = create_async_engine(str(settings.DATABASE_URI))
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
+
     async with async_session() as session:
         # Check version
         try:
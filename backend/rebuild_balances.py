@@ -0,0 +1,44 @@
+import asyncio
+import sys
+import os
+
+# Add backend to sys.path to ensure imports work from root
+backend_path = os.path.join(os.getcwd(), 'backend')
+if backend_path not in sys.path:
+    sys.path.append(backend_path)
+
+from app.db.session import async_session
+from app.services.balances import BalanceService
+
+
+async def main(command: str):
+    async with async_session() as session:
+        if command == "rebuild":
+            print("Rebuilding tenant balances from charges and payments...")
+            await BalanceService.rebuild_all(session)
+            await session.commit()
+            print("✅ Tenant balances rebuilt.")
+
+        mismatches = await BalanceService.verify(session)
+        if not mismatches:
+            print("✅ Tenant balances match the charges.")
+            return True
+
+        print(f"❌ {len(mismatches)} tenant balance(s) out of sync:")
+        for row in mismatches[:50]:
+            print(
+                f"  tenant {row.tenant_id}: total_due stored={row.stored_total_due} actual={row.total_due}, "
+                f"overdue stored={row.stored_overdue_amount} actual={row.overdue_amount}, "
+                f"next_due stored={row.stored_next_due_date} actual={row.next_due_date}"
+            )
+        return False
+
+
+if __name__ == "__main__":
+    # Usage: python rebuild_balances.py [verify|rebuild]
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command not in ("verify", "rebuild"):
+        sys.exit("Usage: python rebuild_balances.py [verify|rebuild]")
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    sys.exit(0 if asyncio.run(main(command)) else 1)
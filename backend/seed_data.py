@@ -8,16 +8,13 @@ backend_path = os.path.join(os.getcwd(), 'backend')
 if backend_path not in sys.path:
     sys.path.append(backend_path)
 
-from sqlalchemy.orm import sessionmaker
-from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.session import engine
+from app.db.session import async_session
 from app.models import Agency, User, Property, Tenant, Contract, Payment
 from app.services.contracts import ContractService
 from app.services.payments import PaymentService
 
 async def seed():
     print("Seeding data...")
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     
     async with async_session() as session:
         # 1. Create Agency
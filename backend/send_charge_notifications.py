@@ -0,0 +1,38 @@
+import asyncio
+import sys
+import os
+
+# Add backend to sys.path to ensure imports work from root
+backend_path = os.path.join(os.getcwd(), 'backend')
+if backend_path not in sys.path:
+    sys.path.append(backend_path)
+
+from app.db.session import engine
+from app.services.notifications import NOTIFICATION_KINDS, NotificationService
+from app.services.whatsapp import whatsapp_service
+
+
+async def main(kinds):
+    try:
+        for kind in kinds:
+            print(f"Sending {kind} notifications...")
+            result = await NotificationService.dispatch(kind)
+            print(
+                f"✅ {kind}: {result.tenants_notified} tenant(s) / {result.charges_notified} charge(s) notified, "
+                f"{result.failed} failed, {result.skipped} without phone, "
+                f"{result.already_claimed} charge(s) claimed by another run ({result.elapsed_seconds}s)"
+            )
+    finally:
+        await whatsapp_service.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Usage: python send_charge_notifications.py [reminder|overdue|all]
+    # Safe to rerun: charges already notified are skipped.
+    command = sys.argv[1] if len(sys.argv) > 1 else "all"
+    if command not in NOTIFICATION_KINDS + ("all",):
+        sys.exit("Usage: python send_charge_notifications.py [reminder|overdue|all]")
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(NOTIFICATION_KINDS if command == "all" else (command,)))